@@ -0,0 +1,143 @@
+"""Pipelined bulk processing for NewsBlink backend.
+
+A bulk request runs every video through the same stages as /process_video,
+but each stage has its own workers and its own concurrency limit:
+
+    fetch (I/O pool) -> summarize (batched) -> classify (batched) -> finish (pool)
+
+Items move to the next stage as soon as they are ready, so transcripts are
+still being downloaded while BART summarizes the first ones. The batched
+stages take whatever is waiting (up to their batch size) each time they run,
+which keeps BART and MiniLM on full batches under load without delaying a
+lone item. Results are yielded per item as soon as that item finishes.
+"""
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+BULK_MAX_VIDEOS = int(os.environ.get("NEWSBLINK_BULK_MAX_VIDEOS", "200"))
+BULK_FETCH_WORKERS = int(os.environ.get("NEWSBLINK_BULK_FETCH_WORKERS", "8"))
+BULK_SUMMARY_BATCH = int(os.environ.get("NEWSBLINK_BULK_SUMMARY_BATCH", "4"))
+BULK_CLASSIFY_BATCH = int(os.environ.get("NEWSBLINK_BULK_CLASSIFY_BATCH", "32"))
+BULK_FINISH_WORKERS = int(os.environ.get("NEWSBLINK_BULK_FINISH_WORKERS", "4"))
+
+_STOP = object()
+
+
+class BatchPipeline:
+    """Runs items through fetch -> summarize -> classify -> finish stages.
+
+    Each stage function receives and updates per-item state dicts:
+
+    - fetch(state): I/O for one item. Setting state["result"] ends the item
+      early (for example a cache hit).
+    - summarize(states) / classify(states): one batched call for several items.
+      If a batch raises, its items are retried one at a time so a single bad
+      item only fails itself.
+    - finish(state): returns the item's final result.
+
+    A stage that raises for an item ends that item with the exception.
+    """
+
+    def __init__(self, fetch, summarize, classify, finish, fetch_workers=BULK_FETCH_WORKERS,
+                 summary_batch=BULK_SUMMARY_BATCH, classify_batch=BULK_CLASSIFY_BATCH,
+                 finish_workers=BULK_FINISH_WORKERS):
+        self.fetch = fetch
+        self.summarize = summarize
+        self.classify = classify
+        self.finish = finish
+        self.fetch_workers = max(1, fetch_workers)
+        self.summary_batch = max(1, summary_batch)
+        self.classify_batch = max(1, classify_batch)
+        self.finish_workers = max(1, finish_workers)
+
+    def run(self, states):
+        """Yield (state, result, error) for every state, in completion order."""
+        states = list(states)
+        if not states:
+            return
+        done = queue.Queue()
+        summarize_queue = queue.Queue()
+        classify_queue = queue.Queue()
+        fetch_pool = ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix="newsblink-bulk-fetch")
+        finish_pool = ThreadPoolExecutor(max_workers=self.finish_workers, thread_name_prefix="newsblink-bulk-finish")
+
+        def run_fetch(state):
+            try:
+                self.fetch(state)
+            except Exception as e:
+                done.put((state, None, e))
+                return
+            if "result" in state:
+                done.put((state, state["result"], None))
+            else:
+                summarize_queue.put(state)
+
+        def run_finish(state):
+            try:
+                done.put((state, self.finish(state), None))
+            except Exception as e:
+                done.put((state, None, e))
+
+        summarizer = threading.Thread(
+            target=self._batch_worker, name="newsblink-bulk-summarize", daemon=True,
+            args=(self.summarize, summarize_queue, self.summary_batch, classify_queue.put, done))
+        classifier = threading.Thread(
+            target=self._batch_worker, name="newsblink-bulk-classify", daemon=True,
+            args=(self.classify, classify_queue, self.classify_batch,
+                  lambda state: finish_pool.submit(run_finish, state), done))
+        summarizer.start()
+        classifier.start()
+        for state in states:
+            fetch_pool.submit(run_fetch, state)
+
+        try:
+            for _ in range(len(states)):
+                yield done.get()
+        finally:
+            # Also reached when the client disconnects; queued items are dropped
+            fetch_pool.shutdown(wait=False, cancel_futures=True)
+            summarize_queue.put(_STOP)
+            classify_queue.put(_STOP)
+            finish_pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _batch_worker(stage, inbox, batch_size, forward, done):
+        while True:
+            batch = [inbox.get()]
+            # Take whatever else is already waiting, up to the batch size
+            while len(batch) < batch_size:
+                try:
+                    batch.append(inbox.get_nowait())
+                except queue.Empty:
+                    break
+            stop = _STOP in batch
+            batch = [state for state in batch if state is not _STOP]
+            if batch:
+                try:
+                    stage(batch)
+                    finished = [(state, None) for state in batch]
+                except Exception as e:
+                    if len(batch) == 1:
+                        finished = [(batch[0], e)]
+                    else:
+                        logging.warning(f"Bulk {stage.__name__} batch of {len(batch)} failed, retrying one by one: {e}")
+                        finished = []
+                        for state in batch:
+                            try:
+                                stage([state])
+                                finished.append((state, None))
+                            except Exception as item_error:
+                                finished.append((state, item_error))
+                for state, error in finished:
+                    if error is not None:
+                        done.put((state, None, error))
+                        continue
+                    try:
+                        forward(state)
+                    except RuntimeError:
+                        return  # the run was abandoned and the next stage shut down
+            if stop:
+                return
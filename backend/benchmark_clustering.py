@@ -0,0 +1,86 @@
+"""Benchmark retrain clustering time and peak memory for NewsBlink backend.
+
+Each (mode, rows) pair runs in a fresh subprocess so peak RSS is not shared
+between runs. Embeddings are synthetic (a Gaussian mixture in the MiniLM
+embedding size), so only timing and memory are meaningful, not cluster quality.
+
+    python backend/benchmark_clustering.py --rows 10000 100000 1000000 --modes exact scalable
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+EMBEDDING_DIM = 384  # paraphrase-MiniLM-L6-v2
+
+
+def synthetic_embeddings(n_rows, n_topics=8, dim=EMBEDDING_DIM, seed=0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim), dtype=np.float32)
+    embeddings = np.empty((n_rows, dim), dtype=np.float32)
+    # Small float32 chunks, so generating the data does not set the peak RSS the fit is measured by
+    for start in range(0, n_rows, 10000):
+        end = min(n_rows, start + 10000)
+        picks = rng.integers(0, n_topics, size=end - start)
+        noise = rng.standard_normal((end - start, dim), dtype=np.float32)
+        noise *= 0.8
+        embeddings[start:end] = topics[picks] + noise
+    return embeddings
+
+
+def run_single(mode, n_rows):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from clustering import train_agnes_clustering
+
+    embeddings = synthetic_embeddings(n_rows)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.time()
+    train_agnes_clustering(None, embeddings=embeddings, mode=mode)
+    elapsed = time.time() - started
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in KiB on Linux
+    print(json.dumps({
+        "mode": mode,
+        "rows": n_rows,
+        "seconds": round(elapsed, 2),
+        "peak_rss_mb": round(peak_rss / 1024, 1),
+        "embeddings_mb": round(embeddings.nbytes / 2 ** 20, 1),
+        "rss_before_fit_mb": round(baseline_rss / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--modes", nargs="+", default=["exact", "scalable"], choices=["exact", "scalable"])
+    parser.add_argument("--timeout", type=int, default=3600, help="seconds before a run is abandoned")
+    parser.add_argument("--single", nargs=2, metavar=("MODE", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args.single[0], int(args.single[1]))
+        return
+
+    for mode in args.modes:
+        for n_rows in args.rows:
+            try:
+                proc = subprocess.run([sys.executable, __file__, "--single", mode, str(n_rows)],
+                                      capture_output=True, text=True, timeout=args.timeout)
+            except subprocess.TimeoutExpired:
+                print(json.dumps({"mode": mode, "rows": n_rows, "error": f"timeout after {args.timeout}s"}))
+                continue
+            lines = proc.stdout.strip().splitlines()
+            if proc.returncode == 0 and lines:
+                print(lines[-1])
+            else:
+                # Typically MemoryError or the OOM killer for exact mode at large sizes
+                error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit code {proc.returncode}"
+                print(json.dumps({"mode": mode, "rows": n_rows, "error": error}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Compare fp32 and int8-quantized BART/MiniLM for NewsBlink backend.
+
+Summarizes and classifies the same transcripts from a dataset workbook once
+per mode, each in a fresh subprocess (so peak RSS and torch thread settings
+are independent), then reports per mode:
+
+- latency: seconds per transcript for summarization and classification
+- peak RSS
+- ROUGE-1/2/L F1 against the dataset's reference summaries
+- category agreement with the dataset's Category column
+
+plus ROUGE and category agreement of int8 against fp32 outputs. ROUGE is
+computed here (lower-cased word tokens, no stemming) so no extra package is
+needed. Run from the repository root:
+
+    python backend/benchmark_quantization.py --rows 50 --threads 4 --output backend/benchmarks/quantization.json
+
+and record the results in backend/QUANTIZATION_RESULTS.md.
+"""
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+
+DATASET_PATH = "backend/datasets/Research_Project_Dataset_2.xlsx"
+TRANSCRIPT_COLUMN = "NEWS (Full Transcript)"
+SUMMARY_COLUMN = "Summary"
+CATEGORY_COLUMN = "Category"
+MODES = {"fp32": "0", "int8": "1"}
+
+
+def tokenize(text):
+    return re.findall(r"\w+", str(text).lower())
+
+
+def _f1(overlap, candidate_total, reference_total):
+    if overlap == 0 or candidate_total == 0 or reference_total == 0:
+        return 0.0
+    precision = overlap / candidate_total
+    recall = overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(candidate, reference, n):
+    candidate_ngrams = Counter(zip(*[candidate[i:] for i in range(n)]))
+    reference_ngrams = Counter(zip(*[reference[i:] for i in range(n)]))
+    overlap = sum((candidate_ngrams & reference_ngrams).values())
+    return _f1(overlap, sum(candidate_ngrams.values()), sum(reference_ngrams.values()))
+
+
+def rouge_l(candidate, reference):
+    # Longest common subsequence, one DP row at a time
+    previous = [0] * (len(reference) + 1)
+    for token in candidate:
+        current = [0]
+        for j, reference_token in enumerate(reference):
+            current.append(previous[j] + 1 if token == reference_token else max(previous[j + 1], current[j]))
+        previous = current
+    return _f1(previous[-1], len(candidate), len(reference))
+
+
+def rouge_scores(candidates, references):
+    """Mean ROUGE-1/2/L F1 over paired candidate and reference texts."""
+    totals = {"rouge1": 0.0, "rouge2": 0.0, "rougeL": 0.0}
+    pairs = [(tokenize(c), tokenize(r)) for c, r in zip(candidates, references)]
+    for candidate, reference in pairs:
+        totals["rouge1"] += rouge_n(candidate, reference, 1)
+        totals["rouge2"] += rouge_n(candidate, reference, 2)
+        totals["rougeL"] += rouge_l(candidate, reference)
+    return {name: round(total / max(1, len(pairs)), 4) for name, total in totals.items()}
+
+
+def agreement(labels, other_labels):
+    pairs = list(zip(labels, other_labels))
+    return round(sum(1 for a, b in pairs if str(a).strip().lower() == str(b).strip().lower()) / max(1, len(pairs)), 4)
+
+
+def load_rows(path, n_rows):
+    import pandas as pd
+    df = pd.read_excel(path, usecols=[TRANSCRIPT_COLUMN, SUMMARY_COLUMN, CATEGORY_COLUMN]).dropna()
+    return df.head(n_rows)
+
+
+def run_single(mode, path, n_rows):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from modified_preprocessing import get_summarizer, summarize_text, clean_text
+    from clustering import get_bert_model, classify_with_confidence
+    from utils import get_category_name
+
+    rows = load_rows(path, n_rows)
+    started = time.perf_counter()
+    get_summarizer()
+    get_bert_model()
+    load_seconds = time.perf_counter() - started
+
+    summaries, categories = [], []
+    summarize_seconds = classify_seconds = 0.0
+    for transcript in rows[TRANSCRIPT_COLUMN]:
+        started = time.perf_counter()
+        summary = summarize_text(str(transcript))
+        summarize_seconds += time.perf_counter() - started
+        started = time.perf_counter()
+        cluster = classify_with_confidence(clean_text(summary))["cluster"]
+        classify_seconds += time.perf_counter() - started
+        summaries.append(summary)
+        categories.append(get_category_name(cluster))
+
+    import torch
+    # ru_maxrss is reported in KiB on Linux
+    print(json.dumps({
+        "mode": mode,
+        "rows": len(summaries),
+        "torch_threads": torch.get_num_threads(),
+        "load_seconds": round(load_seconds, 2),
+        "summarize_seconds_per_row": round(summarize_seconds / max(1, len(summaries)), 3),
+        "classify_seconds_per_row": round(classify_seconds / max(1, len(summaries)), 4),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "summaries": summaries,
+        "categories": categories,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument("--rows", type=int, default=50, help="number of dataset rows to evaluate")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0: torch default)")
+    parser.add_argument("--timeout", type=int, default=7200, help="seconds before a run is abandoned")
+    parser.add_argument("--output", help="also write the reports to this JSON file")
+    parser.add_argument("--single", nargs=1, metavar="MODE", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args.single[0], args.dataset, args.rows)
+        return
+
+    rows = load_rows(args.dataset, args.rows)
+    references = rows[SUMMARY_COLUMN].tolist()
+    labels = rows[CATEGORY_COLUMN].tolist()
+    runs = {}
+    reports = []
+
+    def emit(report):
+        reports.append(report)
+        print(json.dumps(report))
+
+    for mode in args.modes:
+        # Always in-process models, never the shared model server
+        env = dict(os.environ, NEWSBLINK_QUANTIZE=MODES[mode], NEWSBLINK_TORCH_THREADS=str(args.threads),
+                   NEWSBLINK_MODEL_SERVER="")
+        command = [sys.executable, __file__, "--single", mode, "--dataset", args.dataset, "--rows", str(args.rows)]
+        try:
+            proc = subprocess.run(command, capture_output=True, text=True, timeout=args.timeout, env=env)
+        except subprocess.TimeoutExpired:
+            emit({"mode": mode, "error": f"timeout after {args.timeout}s"})
+            continue
+        lines = [line for line in proc.stdout.strip().splitlines() if line.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit code {proc.returncode}"
+            emit({"mode": mode, "error": error})
+            continue
+        run = json.loads(lines[-1])
+        runs[mode] = run
+        report = {key: value for key, value in run.items() if key not in ("summaries", "categories")}
+        report["rouge_vs_reference"] = rouge_scores(run["summaries"], references)
+        report["category_agreement_vs_dataset"] = agreement(run["categories"], labels)
+        emit(report)
+
+    if "fp32" in runs and "int8" in runs:
+        fp32, int8 = runs["fp32"], runs["int8"]
+        emit({
+            "comparison": "int8 vs fp32",
+            "rouge": rouge_scores(int8["summaries"], fp32["summaries"]),
+            "category_agreement": agreement(int8["categories"], fp32["categories"]),
+            "summarize_speedup": round(fp32["summarize_seconds_per_row"] / max(1e-9, int8["summarize_seconds_per_row"]), 2),
+            "peak_rss_saved_mb": round(fp32["peak_rss_mb"] - int8["peak_rss_mb"], 1),
+        })
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"dataset": args.dataset, "rows": len(rows), "threads": args.threads, "reports": reports}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
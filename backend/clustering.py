@@ -1,26 +1,103 @@
 """Clustering utilities for NewsBlink backend."""
 import numpy as np
-import pickle
 import os
-from sklearn.cluster import AgglomerativeClustering
+from sklearn.cluster import AgglomerativeClustering, MiniBatchKMeans
 # from sklearn.cluster import SpectralClustering
 from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics import silhouette_score, davies_bouldin_score
-
-# Load pre-trained BERT model
-bert_model = SentenceTransformer("paraphrase-MiniLM-L6-v2")
-
-MODEL_PATH = "backend/models/agnes_model.pkl"
-# MODEL_PATH = "backend/models/spectral_model.pkl"
-
-
-def train_agnes_clustering(summaries, n_clusters=8):
-    """Train AGNES clustering and save model with correct format."""
-    embeddings = bert_model.encode(summaries, convert_to_numpy=True)
-
-    clustering_model = AgglomerativeClustering(n_clusters=n_clusters, metric='cosine', linkage='average')
-    cluster_labels = clustering_model.fit_predict(embeddings)
+try:
+    from .model_registry import get_active_bundle
+    from .model_handles import LazyModel, configure_torch, quantize_linear_layers, QUANTIZE
+    from .model_server import get_client, RemoteEncoder
+    from .embedding_cache import EmbeddingCache, CachedEncoder
+    from .metrics import time_stage
+except ImportError:
+    from model_registry import get_active_bundle
+    from model_handles import LazyModel, configure_torch, quantize_linear_layers, QUANTIZE
+    from model_server import get_client, RemoteEncoder
+    from embedding_cache import EmbeddingCache, CachedEncoder
+    from metrics import time_stage
+
+EMBEDDING_MODEL_NAME = "paraphrase-MiniLM-L6-v2"
+
+def load_local_bert_model(quantize=QUANTIZE):
+    # sentence_transformers pulls in torch, so it is only imported when the model is needed
+    from sentence_transformers import SentenceTransformer
+    configure_torch()
+    if quantize:
+        # int8 dynamic quantization only runs on CPU
+        return quantize_linear_layers(SentenceTransformer(EMBEDDING_MODEL_NAME, device="cpu"))
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+def _load_bert_model():
+    # With NEWSBLINK_MODEL_SERVER set, encoding runs in the shared model server
+    client = get_client()
+    encoder = RemoteEncoder(client) if client is not None else load_local_bert_model()
+    # Texts embedded before (by any worker, or before a restart) are served from the shared cache
+    cache_name = EMBEDDING_MODEL_NAME + ("-int8" if QUANTIZE else "")
+    return CachedEncoder(encoder, EmbeddingCache(cache_name))
+
+# Pre-trained BERT model, loaded on first use (see model_handles)
+bert_model_handle = LazyModel("bert_model", _load_bert_model)
+
+def get_bert_model():
+    return bert_model_handle.get()
+
+# "exact" runs AGNES over every embedding (O(n^2) time and memory), "scalable"
+# runs it over mini-batch k-means micro-clusters, "auto" picks by dataset size.
+# See CLUSTERING_SCALING.md for measured costs.
+CLUSTERING_MODE = os.environ.get("NEWSBLINK_CLUSTERING_MODE", "auto")
+EXACT_CLUSTERING_MAX_ROWS = int(os.environ.get("NEWSBLINK_EXACT_CLUSTERING_MAX_ROWS", "5000"))
+MICRO_CLUSTERS = int(os.environ.get("NEWSBLINK_MICRO_CLUSTERS", "1000"))
+MICRO_BATCH_SIZE = 4096
+
+
+def scalable_cluster_labels(embeddings, n_clusters=8, n_micro=MICRO_CLUSTERS, batch_size=MICRO_BATCH_SIZE):
+    """Approximate AGNES labels without the O(n^2) distance matrix.
+
+    Embeddings are streamed through mini-batch k-means to get n_micro
+    micro-clusters, AGNES (same cosine/average settings) groups the
+    micro-centroids into n_clusters, and every row takes the label of its
+    nearest micro-centroid. Working memory is O(batch_size + n_micro^2).
+    """
+    n_rows = len(embeddings)
+    # partial_fit needs at least n_micro rows in the first batch
+    n_micro = max(n_clusters, min(n_micro, batch_size, n_rows))
+    rng = np.random.RandomState(42)
+    order = rng.permutation(n_rows)
+
+    kmeans = MiniBatchKMeans(n_clusters=n_micro, batch_size=batch_size, random_state=42, n_init=3)
+    for start in range(0, n_rows, batch_size):
+        batch = np.sort(order[start:start + batch_size])
+        if start > 0 or len(batch) >= n_micro:
+            kmeans.partial_fit(normalize_rows(embeddings[batch]))
+
+    micro_centroids = normalize_rows(kmeans.cluster_centers_)
+    micro_labels = AgglomerativeClustering(n_clusters=n_clusters, metric='cosine', linkage='average').fit_predict(micro_centroids)
+
+    cluster_labels = np.empty(n_rows, dtype=np.int64)
+    for start in range(0, n_rows, batch_size):
+        nearest = np.argmax(normalize_rows(embeddings[start:start + batch_size]) @ micro_centroids.T, axis=1)
+        cluster_labels[start:start + batch_size] = micro_labels[nearest]
+    return cluster_labels
+
+
+def train_agnes_clustering(summaries, n_clusters=8, embeddings=None, mode=CLUSTERING_MODE):
+    """Train AGNES clustering and return the model data in the registry format.
+
+    Pass precomputed embeddings (one row per summary) to skip encoding.
+    mode is "exact", "scalable" or "auto" (see CLUSTERING_MODE).
+    Publishing the result is left to the caller (see model_registry).
+    """
+    if embeddings is None:
+        embeddings = get_bert_model().encode(summaries, convert_to_numpy=True)
+
+    if mode == "auto":
+        mode = "exact" if len(embeddings) <= EXACT_CLUSTERING_MAX_ROWS else "scalable"
+    if mode == "scalable":
+        cluster_labels = scalable_cluster_labels(embeddings, n_clusters)
+    else:
+        clustering_model = AgglomerativeClustering(n_clusters=n_clusters, metric='cosine', linkage='average')
+        cluster_labels = clustering_model.fit_predict(embeddings)
 
     # Compute centroids
     cluster_centroids = []
@@ -35,12 +112,10 @@ def train_agnes_clustering(summaries, n_clusters=8):
     model_data = {
         "embeddings": embeddings,  # Store embeddings for evaluation
         "labels": cluster_labels.tolist(),  # Store assigned cluster labels
-        "centroids": np.array(cluster_centroids)
+        "centroids": np.array(cluster_centroids),
+        "model_name": EMBEDDING_MODEL_NAME  # Recorded in the registry manifest
     }
 
-    with open(MODEL_PATH, "wb") as f:
-        pickle.dump(model_data, f)
-
     return model_data
 
 # def train_spectral_clustering(summaries, n_clusters=8):
@@ -82,14 +157,28 @@ def train_agnes_clustering(summaries, n_clusters=8):
 
 
 def load_agnes_model():
-    """Load AGNES model if available, else return None."""
-    if os.path.exists(MODEL_PATH):
-        with open(MODEL_PATH, "rb") as f:
-            return pickle.load(f)
-    return None
+    """Return the active AGNES model from the registry if available, else None."""
+    bundle = get_active_bundle()
+    return bundle.model_data if bundle is not None else None
+
+def normalize_rows(matrix):
+    """Return a float32 copy of matrix with unit-length rows (zero rows stay zero)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def _require_bundle(bundle=None):
+    bundle = bundle or get_active_bundle()
+    if bundle is None:
+        raise ValueError("AGNES model is not trained. Train it first!")
+    return bundle
 
-# Load AGNES model at startup
-agnes_model = load_agnes_model()
+def get_normalized_centroids(bundle):
+    """Centroids normalized once per model version so classification is a single dot product."""
+    if "normalized_centroids" not in bundle.cache:
+        bundle.cache["normalized_centroids"] = normalize_rows(bundle.model_data["centroids"])
+    return bundle.cache["normalized_centroids"]
 
 # def load_spectral_model():
 #     """Load Spectral model if available."""
@@ -103,10 +192,9 @@ agnes_model = load_agnes_model()
 
 def classify_new_summary(summary):
     """Classify a new summary into the closest AGNES cluster."""
-    if agnes_model is None:
-        raise ValueError("AGNES model is not trained. Train it first!")
+    agnes_model = _require_bundle().model_data
 
-    summary_embedding = bert_model.encode([summary], convert_to_numpy=True)[0]
+    summary_embedding = get_bert_model().encode([summary], convert_to_numpy=True)[0]
     
     centroids = np.array(agnes_model["centroids"])  # Use stored centroids
     similarities = cosine_similarity([summary_embedding], centroids)[0]
@@ -116,11 +204,10 @@ def classify_new_summary(summary):
 
 def compute_confidence_score(summary, cluster_id):
     """Compute confidence score based on cosine similarity between summary embedding and cluster centroid."""
-    if agnes_model is None:
-        raise ValueError("AGNES model is not trained. Train it first!")
+    agnes_model = _require_bundle().model_data
     
     # Get the summary embedding
-    summary_embedding = bert_model.encode([summary], convert_to_numpy=True)[0]
+    summary_embedding = get_bert_model().encode([summary], convert_to_numpy=True)[0]
     
     # Get the centroid of the assigned cluster
     centroids = np.array(agnes_model["centroids"])
@@ -134,6 +221,39 @@ def compute_confidence_score(summary, cluster_id):
     
     return confidence_score
 
+def classify_with_confidence(summary, top_k=3, bundle=None):
+    """Encode a summary once and score it against every AGNES centroid.
+
+    Returns the predicted cluster, its confidence (cosine similarity as a
+    percentage), the full similarity vector and the top_k closest clusters.
+    Uses the active registry model unless a ModelBundle is given.
+    """
+    return classify_batch([summary], top_k, bundle)[0]
+
+def classify_batch(summaries, top_k=3, bundle=None):
+    """classify_with_confidence for several summaries with a single encode call."""
+    bundle = _require_bundle(bundle)
+    if not summaries:
+        return []
+    with time_stage("classify"):
+        return _classify_batch(summaries, top_k, bundle)
+
+def _classify_batch(summaries, top_k, bundle):
+    summary_embeddings = normalize_rows(get_bert_model().encode(list(summaries), convert_to_numpy=True))
+    all_similarities = summary_embeddings @ get_normalized_centroids(bundle).T
+
+    results = []
+    for similarities in all_similarities:
+        ranked = np.argsort(-similarities)[:max(1, top_k)]
+        predicted_cluster = int(ranked[0])
+        results.append({
+            "cluster": predicted_cluster,
+            "confidence": round(float(similarities[predicted_cluster]) * 100, 2),
+            "similarities": similarities.tolist(),
+            "top_clusters": [(int(cluster), float(similarities[cluster])) for cluster in ranked],
+        })
+    return results
+
 # def classify_new_summary(summary):
 #     """Classify a new summary into the closest Spectral cluster."""
 #     if spectral_model is None:
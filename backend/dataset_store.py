@@ -0,0 +1,209 @@
+"""Dataset storage backends for NewsBlink backend.
+
+The training dataset used to live only in an Excel workbook that was read and
+rewritten in full for every appended row. The SQLite backend keeps the same
+three columns in an indexed table, so appends are O(1) and retraining can
+scan just the columns it needs. The workbook format is
+still available as a backend and through import/export for the research team:
+
+    python -m backend.dataset_store import backend/datasets/Research_Project_Dataset_2.xlsx
+    python -m backend.dataset_store export backend/datasets/export.xlsx
+"""
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+import pandas as pd
+
+DATASET_PATH = "backend/datasets/Research_project_Dataset_1.xlsx"
+SQLITE_PATH = os.environ.get("NEWSBLINK_DATASET_DB", "backend/datasets/newsblink.sqlite3")
+DATASET_BACKEND = os.environ.get("NEWSBLINK_DATASET_BACKEND", "sqlite")
+
+TRANSCRIPT_COLUMN = "NEWS (Full Transcript)"
+SUMMARY_COLUMN = "Summary"
+CATEGORY_COLUMN = "Category"
+COLUMNS = [TRANSCRIPT_COLUMN, SUMMARY_COLUMN, CATEGORY_COLUMN]
+
+# Dataset column -> SQLite column
+_SQL_COLUMNS = {TRANSCRIPT_COLUMN: "transcript", SUMMARY_COLUMN: "summary", CATEGORY_COLUMN: "category"}
+
+
+def transcript_hash(transcript):
+    return hashlib.sha1(str(transcript).encode("utf-8")).hexdigest()
+
+
+class ExcelDatasetStore:
+    """Original behaviour: the whole workbook is read and rewritten on append."""
+
+    def __init__(self, path=DATASET_PATH):
+        self.path = path
+
+    def read_frame(self, columns=None, start=0):
+        df = pd.read_excel(self.path).iloc[start:]
+        return df[columns] if columns else df
+
+    def read_rows(self, rows, columns=None):
+        df = pd.read_excel(self.path)[columns or COLUMNS]
+        return {row: df.iloc[row].to_dict() for row in rows if 0 <= row < len(df)}
+
+    def count(self):
+        return len(pd.read_excel(self.path))
+
+    def append(self, transcript, summary, category):
+        df = pd.read_excel(self.path)
+        new_row = {TRANSCRIPT_COLUMN: transcript, SUMMARY_COLUMN: summary, CATEGORY_COLUMN: category}
+        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+        df.to_excel(self.path, index=False)
+        return len(df) - 1
+
+    def import_xlsx(self, path):
+        df = pd.read_excel(self.path)
+        incoming = pd.read_excel(path)[COLUMNS]
+        pd.concat([df, incoming], ignore_index=True).to_excel(self.path, index=False)
+        return len(incoming)
+
+    def export_xlsx(self, path):
+        self.read_frame().to_excel(path, index=False)
+
+
+class SQLiteDatasetStore:
+    """Append-only SQLite table with the dataset's three columns.
+
+    Rows are never deleted and each insert is a single transaction, so the
+    AUTOINCREMENT ids are 1..n without gaps and a row's zero-based position
+    is its id - 1.
+    """
+
+    def __init__(self, path=SQLITE_PATH, seed_paths=(DATASET_PATH,)):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS news ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " transcript TEXT,"
+                " summary TEXT,"
+                " category TEXT,"
+                " transcript_sha1 TEXT,"
+                " created_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS news_transcript_sha1 ON news (transcript_sha1)")
+            conn.execute("CREATE TABLE IF NOT EXISTS imports (path TEXT PRIMARY KEY, rows INTEGER, imported_at REAL)")
+        with closing(self._connect()) as conn:
+            max_id, rows = conn.execute("SELECT COALESCE(MAX(id), 0), COUNT(*) FROM news").fetchone()
+        if max_id != rows:
+            raise ValueError(f"Dataset {self.path} has gaps in its row ids ({rows} rows, max id {max_id}); "
+                             f"rows must only be added through the dataset store")
+        # One-time import of the existing workbooks into an empty database
+        if rows == 0:
+            for seed in seed_paths:
+                if os.path.exists(seed):
+                    self.import_xlsx(seed)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def count(self):
+        # Ids have no gaps, so the largest one is the row count (an index lookup, not a scan)
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM news").fetchone()[0]
+
+    def read_frame(self, columns=None, start=0):
+        """Read the dataset in insertion order from row position start, optionally only some columns."""
+        columns = columns or COLUMNS
+        select = ", ".join(f'{_SQL_COLUMNS[c]} AS "{c}"' for c in columns)
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query(f"SELECT {select} FROM news WHERE id > ? ORDER BY id", conn,
+                                     params=(int(start),))
+
+    def read_rows(self, rows, columns=None):
+        """{row: {column: value}} for rows at the given zero-based positions (as returned by append)."""
+        columns = columns or COLUMNS
+        select = ", ".join(_SQL_COLUMNS[c] for c in columns)
+        ids = {int(row) + 1: row for row in rows if int(row) >= 0}
+        if not ids:
+            return {}
+        placeholders = ", ".join("?" * len(ids))
+        with closing(self._connect()) as conn:
+            found = conn.execute(f"SELECT id, {select} FROM news WHERE id IN ({placeholders})", list(ids)).fetchall()
+        records = {ids[values[0]]: dict(zip(columns, values[1:])) for values in found}
+        # Keep the caller's order
+        return {row: records[row] for row in rows if row in records}
+
+    def append(self, transcript, summary, category):
+        """Append one row and return its zero-based position in the dataset."""
+        with self._lock, closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "INSERT INTO news (transcript, summary, category, transcript_sha1, created_at) VALUES (?, ?, ?, ?, ?)",
+                (transcript, summary, category, transcript_hash(transcript), time.time()),
+            )
+            return cursor.lastrowid - 1
+
+    def import_xlsx(self, path):
+        """Append every row of an Excel workbook; each file is only imported once."""
+        with closing(self._connect()) as conn:
+            if conn.execute("SELECT 1 FROM imports WHERE path = ?", (os.path.abspath(path),)).fetchone():
+                logging.info(f"Dataset {path} was already imported, skipping.")
+                return 0
+        df = pd.read_excel(path)
+        missing = [c for c in COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f"Dataset {path} is missing columns: {missing}")
+        now = time.time()
+        rows = [
+            (None if pd.isna(t) else str(t),
+             None if pd.isna(s) else str(s),
+             None if pd.isna(c) else str(c),
+             transcript_hash(t), now)
+            for t, s, c in zip(df[TRANSCRIPT_COLUMN], df[SUMMARY_COLUMN], df[CATEGORY_COLUMN])
+        ]
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO news (transcript, summary, category, transcript_sha1, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("INSERT INTO imports (path, rows, imported_at) VALUES (?, ?, ?)",
+                         (os.path.abspath(path), len(rows), now))
+        logging.info(f"Imported {len(rows)} rows from {path}")
+        return len(rows)
+
+    def export_xlsx(self, path):
+        self.read_frame().to_excel(path, index=False)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_dataset_store():
+    """Return the configured dataset backend (NEWSBLINK_DATASET_BACKEND=sqlite|excel)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if DATASET_BACKEND == "excel":
+                _store = ExcelDatasetStore()
+            elif DATASET_BACKEND == "sqlite":
+                _store = SQLiteDatasetStore()
+            else:
+                raise ValueError(f"Unknown dataset backend: {DATASET_BACKEND}")
+        return _store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import or export the NewsBlink dataset.")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("path", help="Excel workbook to import from or export to")
+    args = parser.parse_args()
+
+    store = get_dataset_store()
+    if args.command == "import":
+        print(f"Imported {store.import_xlsx(args.path)} rows from {args.path}")
+    else:
+        store.export_xlsx(args.path)
+        print(f"Exported {store.count()} rows to {args.path}")
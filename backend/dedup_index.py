@@ -0,0 +1,215 @@
+"""Duplicate detection for the NewsBlink training dataset.
+
+Every transcript appended to the dataset is recorded in a small SQLite index:
+
+- its SHA-1, for O(1) exact duplicate lookups;
+- a MinHash signature over word shingles, bucketed with LSH, to find
+  near-identical re-uploads (re-encoded captions, an extra sentence, ...).
+
+A transcript counts as a near-duplicate when the estimated Jaccard similarity
+of its shingles with an indexed transcript is at least
+NEWSBLINK_DEDUP_THRESHOLD (default 0.85). The index is filled from the
+dataset the first time it is loaded and can be rebuilt with:
+
+    python -m backend.dedup_index rebuild
+"""
+import argparse
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import closing
+
+import numpy as np
+
+try:
+    from .dataset_store import get_dataset_store, transcript_hash, TRANSCRIPT_COLUMN
+    from .model_handles import LazyModel
+except ImportError:
+    from dataset_store import get_dataset_store, transcript_hash, TRANSCRIPT_COLUMN
+    from model_handles import LazyModel
+
+DEDUP_DB = os.environ.get("NEWSBLINK_DEDUP_DB", "backend/datasets/dedup_index.sqlite3")
+DEDUP_THRESHOLD = float(os.environ.get("NEWSBLINK_DEDUP_THRESHOLD", "0.85"))
+NUM_PERM = 128
+SHINGLE_WORDS = 3
+MINHASH_SEED = 1
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_WORD = re.compile(r"\w+")
+
+DedupMatch = namedtuple("DedupMatch", ["kind", "row", "similarity"])
+
+
+def lsh_params(num_perm, threshold):
+    """Bands and rows per band so the LSH S-curve rises just below threshold.
+
+    Candidates are verified against the signatures afterwards, so erring
+    towards more candidates only costs a few comparisons.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1.0 / bands) ** (1.0 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class MinHasher:
+    """MinHash signatures of word shingles, using universal hashing mod 2^61-1."""
+
+    def __init__(self, num_perm=NUM_PERM, shingle_words=SHINGLE_WORDS, seed=MINHASH_SEED):
+        self.num_perm = num_perm
+        self.shingle_words = shingle_words
+        rng = np.random.RandomState(seed)
+        # a, b and the 32-bit shingle hashes are < 2^32, so a*h + b fits in uint64
+        self._a = rng.randint(1, 2 ** 32 - 1, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 2 ** 32 - 1, size=num_perm, dtype=np.uint64)
+
+    def shingle_hashes(self, text):
+        words = _WORD.findall(str(text).lower())
+        size = min(self.shingle_words, len(words)) or 1
+        shingles = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+        return np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+            dtype=np.uint64, count=len(shingles))
+
+    def signature(self, text):
+        hashes = self.shingle_hashes(text)
+        return ((np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME).min(axis=0)
+
+    @staticmethod
+    def similarity(signature, other):
+        """Estimated Jaccard similarity of the two shingle sets."""
+        return float(np.mean(signature == other))
+
+
+class DedupIndex:
+    """Persistent exact-hash + MinHash/LSH index of dataset transcripts."""
+
+    def __init__(self, path=DEDUP_DB, threshold=DEDUP_THRESHOLD, num_perm=NUM_PERM):
+        self.path = path
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows_per_band = lsh_params(num_perm, threshold)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS docs ("
+                         " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                         " row INTEGER,"
+                         " sha1 TEXT,"
+                         " signature BLOB,"
+                         " created_at REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS docs_sha1 ON docs (sha1)")
+            conn.execute("CREATE TABLE IF NOT EXISTS lsh (bucket INTEGER, doc_id INTEGER)")
+            conn.execute("CREATE INDEX IF NOT EXISTS lsh_bucket ON lsh (bucket)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            params = f"{num_perm}/{SHINGLE_WORDS}/{MINHASH_SEED}/{self.bands}x{self.rows_per_band}"
+            stored = conn.execute("SELECT value FROM meta WHERE key = 'params'").fetchone()
+            if stored and stored[0] != params:
+                # Signatures or buckets from other settings can't be compared; start over
+                logging.info(f"Dedup index parameters changed ({stored[0]} -> {params}), clearing it")
+                conn.execute("DELETE FROM docs")
+                conn.execute("DELETE FROM lsh")
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('params', ?)", (params,))
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def count(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def _buckets(self, signature):
+        buckets = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows_per_band:(band + 1) * self.rows_per_band]
+            digest = hashlib.blake2b(band.to_bytes(2, "little") + rows.tobytes(), digest_size=8).digest()
+            buckets.append(int.from_bytes(digest, "little", signed=True))
+        return buckets
+
+    def check(self, transcript, signature=None):
+        """DedupMatch for the closest indexed transcript at or above the threshold, else None."""
+        with closing(self._connect()) as conn:
+            exact = conn.execute("SELECT row FROM docs WHERE sha1 = ? LIMIT 1",
+                                 (transcript_hash(transcript),)).fetchone()
+            if exact:
+                return DedupMatch("exact", exact[0], 1.0)
+            if signature is None:
+                signature = self.hasher.signature(transcript)
+            buckets = self._buckets(signature)
+            candidates = conn.execute(
+                f"SELECT row, signature FROM docs WHERE id IN "
+                f"(SELECT doc_id FROM lsh WHERE bucket IN ({','.join('?' * len(buckets))}))",
+                buckets).fetchall()
+        best = None
+        for row, blob in candidates:
+            similarity = self.hasher.similarity(signature, np.frombuffer(blob, dtype=np.uint64))
+            if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                best = DedupMatch("near", row, similarity)
+        return best
+
+    def add(self, transcript, row=None, signature=None):
+        """Index a transcript stored at the given dataset row position."""
+        if signature is None:
+            signature = self.hasher.signature(transcript)
+        self._insert([(row, transcript_hash(transcript), signature)])
+
+    def _insert(self, entries):
+        now = time.time()
+        with self._lock, closing(self._connect()) as conn, conn:
+            for row, sha1, signature in entries:
+                cursor = conn.execute("INSERT INTO docs (row, sha1, signature, created_at) VALUES (?, ?, ?, ?)",
+                                      (row, sha1, signature.astype(np.uint64).tobytes(), now))
+                conn.executemany("INSERT INTO lsh (bucket, doc_id) VALUES (?, ?)",
+                                 [(bucket, cursor.lastrowid) for bucket in self._buckets(signature)])
+
+    def rebuild(self, transcripts):
+        """Replace the index with the given transcripts (in dataset row order)."""
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM docs")
+            conn.execute("DELETE FROM lsh")
+        entries = [(row, transcript_hash(t), self.hasher.signature(t))
+                   for row, t in enumerate(transcripts) if isinstance(t, str) and t.strip()]
+        self._insert(entries)
+        logging.info(f"Dedup index rebuilt with {len(entries)} transcript(s)")
+        return len(entries)
+
+
+def _load_dedup_index():
+    index = DedupIndex()
+    if index.count() == 0:
+        store = get_dataset_store()
+        if store.count() > 0:
+            index.rebuild(store.read_frame([TRANSCRIPT_COLUMN])[TRANSCRIPT_COLUMN].tolist())
+    return index
+
+
+dedup_index_handle = LazyModel("dedup_index", _load_dedup_index)
+
+
+def get_dedup_index():
+    return dedup_index_handle.get()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the NewsBlink dataset dedup index.")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("path", nargs="?", help="text file to check against the index")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "rebuild":
+        transcripts = get_dataset_store().read_frame([TRANSCRIPT_COLUMN])[TRANSCRIPT_COLUMN].tolist()
+        print(f"Indexed {DedupIndex().rebuild(transcripts)} transcripts")
+    else:
+        with open(args.path, encoding="utf-8") as f:
+            print(get_dedup_index().check(f.read()))
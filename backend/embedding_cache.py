@@ -0,0 +1,239 @@
+"""Shared sentence-embedding cache for NewsBlink backend.
+
+Embeddings are keyed by a hash of (model name, text). The disk tier for each
+model is two append-only files under NEWSBLINK_EMBEDDING_CACHE_DIR:
+
+- vectors.f32: a float32 matrix, one row per text, memory-mapped for reading
+- index.bin: fixed-size (20-byte SHA-1 key, int64 row) records
+
+A row is always written before its index record, so readers never see a key
+whose vector is incomplete. Appends take an flock, which lets several worker
+processes share one cache; workers can also open it read-only
+(NEWSBLINK_EMBEDDING_CACHE_READONLY=1). Hits are zero-copy views into the
+memory map, and a small in-process LRU keeps the hottest vectors resident.
+
+get_bert_model() returns the encoder wrapped in CachedEncoder, so every
+caller of bert_model.encode goes through this cache.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+try:
+    from .metrics import time_stage, record_cache
+except ImportError:
+    from metrics import time_stage, record_cache
+
+EMBEDDING_CACHE_DIR = os.environ.get("NEWSBLINK_EMBEDDING_CACHE_DIR", "backend/cache/embeddings")
+EMBEDDING_CACHE_READONLY = os.environ.get("NEWSBLINK_EMBEDDING_CACHE_READONLY", "0") == "1"
+EMBEDDING_CACHE_LRU_ITEMS = int(os.environ.get("NEWSBLINK_EMBEDDING_CACHE_LRU_ITEMS", "4096"))
+# Appends stop at this many rows; clear the cache to start over
+EMBEDDING_CACHE_MAX_ROWS = int(os.environ.get("NEWSBLINK_EMBEDDING_CACHE_MAX_ROWS", "2000000"))
+
+_RECORD = struct.Struct("<20sq")
+# encode() arguments that don't change the vectors, so cached results can be reused
+_PASSTHROUGH_KWARGS = {"convert_to_numpy", "batch_size", "show_progress_bar"}
+
+
+def embedding_key(model_name, text):
+    return hashlib.sha1(f"{model_name}\0{text}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """LRU + append-only memory-mapped embedding cache for one model."""
+
+    def __init__(self, model_name, root=EMBEDDING_CACHE_DIR, readonly=EMBEDDING_CACHE_READONLY,
+                 lru_items=EMBEDDING_CACHE_LRU_ITEMS, max_rows=EMBEDDING_CACHE_MAX_ROWS):
+        self.model_name = model_name
+        self.directory = os.path.join(root, model_name.replace("/", "__"))
+        self.readonly = readonly
+        self.lru_items = lru_items
+        self.max_rows = max_rows
+        self.dim = None
+        self.hits = 0
+        self.misses = 0
+        self._index = {}
+        self._index_offset = 0
+        self._rows_indexed = 0
+        self._matrix = None
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._full_logged = False
+        if not self.readonly:
+            os.makedirs(self.directory, exist_ok=True)
+        self._read_meta()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read_meta(self):
+        try:
+            with open(self._path("meta.json"), encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+        except (OSError, ValueError, KeyError):
+            self.dim = None
+
+    def _refresh(self):
+        """Pick up index records and rows appended since the last refresh (by any process)."""
+        try:
+            size = os.path.getsize(self._path("index.bin"))
+        except OSError:
+            return
+        # Only whole records; a concurrent writer may be halfway through one
+        end = size - size % _RECORD.size
+        if end > self._index_offset:
+            with open(self._path("index.bin"), "rb") as f:
+                f.seek(self._index_offset)
+                data = f.read(end - self._index_offset)
+            for key, row in _RECORD.iter_unpack(data):
+                self._index[key] = row
+                self._rows_indexed = max(self._rows_indexed, row + 1)
+            self._index_offset = end
+        if self.dim is None:
+            self._read_meta()
+        if self.dim and self._rows_indexed and (self._matrix is None or self._rows_indexed > len(self._matrix)):
+            # Map again to cover rows appended since the last mapping
+            rows = os.path.getsize(self._path("vectors.f32")) // (4 * self.dim)
+            self._matrix = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r", shape=(rows, self.dim))
+
+    def _lookup(self, key):
+        vector = self._lru.get(key)
+        if vector is not None:
+            self._lru.move_to_end(key)
+            return vector
+        row = self._index.get(key)
+        if row is None or self._matrix is None or row >= len(self._matrix):
+            return None
+        vector = self._matrix[row]
+        self._remember(key, vector)
+        return vector
+
+    def _remember(self, key, vector):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_items:
+            self._lru.popitem(last=False)
+
+    def embed(self, texts, encode_fn):
+        """Return an (n, dim) float32 matrix for texts, encoding only texts not cached yet."""
+        keys = [embedding_key(self.model_name, text) for text in texts]
+        with self._lock:
+            found = {key: self._lookup(key) for key in keys}
+            if any(vector is None for vector in found.values()):
+                self._refresh()
+                found = {key: (vector if vector is not None else self._lookup(key)) for key, vector in found.items()}
+            missing = OrderedDict()
+            for key, text in zip(keys, texts):
+                if found[key] is None and key not in missing:
+                    missing[key] = text
+            hits = len(keys) - sum(1 for key in keys if key in missing)
+            self.hits += hits
+            self.misses += len(missing)
+        record_cache("embedding", True, hits)
+        record_cache("embedding", False, len(missing))
+
+        if missing:
+            encoded = np.asarray(encode_fn(list(missing.values())), dtype=np.float32).reshape(len(missing), -1)
+            with self._lock:
+                for key, vector in zip(missing, encoded):
+                    found[key] = vector
+                    self._remember(key, vector)
+                if not self.readonly:
+                    self._append(list(missing), encoded)
+        if not keys:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    def _append(self, keys, vectors):
+        try:
+            with open(self._path("append.lock"), "a") as lock_file:
+                # Released when lock_file is closed; without fcntl, appends are only serialized in-process
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._read_meta()
+                if self.dim is None:
+                    self.dim = int(vectors.shape[1])
+                    tmp_path = self._path(f"meta.json.{os.getpid()}.tmp")
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump({"model": self.model_name, "dim": self.dim}, f)
+                    os.replace(tmp_path, self._path("meta.json"))
+                if vectors.shape[1] != self.dim:
+                    logging.warning(f"Embedding size {vectors.shape[1]} does not match cache {self.directory} ({self.dim}); not appending")
+                    return
+                with open(self._path("vectors.f32"), "ab") as f:
+                    row_bytes = 4 * self.dim
+                    size = f.seek(0, os.SEEK_END)
+                    if size % row_bytes:
+                        # Drop a partial row left by a writer that crashed mid-append
+                        f.truncate(size - size % row_bytes)
+                        size -= size % row_bytes
+                    first_row = size // row_bytes
+                    if first_row + len(keys) > self.max_rows:
+                        if not self._full_logged:
+                            logging.warning(f"Embedding cache {self.directory} is full ({first_row} rows); not appending")
+                            self._full_logged = True
+                        return
+                    f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(self._path("index.bin"), "ab") as f:
+                    f.write(b"".join(_RECORD.pack(key, first_row + i) for i, key in enumerate(keys)))
+        except OSError as e:
+            logging.warning(f"Could not append to embedding cache {self.directory}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {"model": self.model_name, "rows": len(self._index), "lru_items": len(self._lru),
+                    "hits": self.hits, "misses": self.misses, "readonly": self.readonly}
+
+
+class CachedEncoder:
+    """Wraps an object with encode() (SentenceTransformer, RemoteEncoder) with an EmbeddingCache."""
+
+    def __init__(self, model, cache):
+        self.model = model
+        self.cache = cache
+
+    def encode(self, sentences, **kwargs):
+        with time_stage("encode"):
+            return self._encode(sentences, **kwargs)
+
+    def _encode(self, sentences, **kwargs):
+        if set(kwargs) - _PASSTHROUGH_KWARGS or kwargs.get("convert_to_numpy") is False:
+            return self.model.encode(sentences, **kwargs)
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = self.cache.embed(texts, lambda missing: self.model.encode(missing, **kwargs))
+        return embeddings[0] if single else embeddings
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the NewsBlink embedding cache.")
+    parser.add_argument("command", choices=["stats", "clear"])
+    args = parser.parse_args()
+
+    if not os.path.isdir(EMBEDDING_CACHE_DIR):
+        print(f"No embedding cache at {EMBEDDING_CACHE_DIR}")
+    elif args.command == "clear":
+        shutil.rmtree(EMBEDDING_CACHE_DIR)
+        print(f"Removed {EMBEDDING_CACHE_DIR}")
+    else:
+        for name in sorted(os.listdir(EMBEDDING_CACHE_DIR)):
+            cache = EmbeddingCache(name, readonly=True)
+            cache._refresh()
+            print(json.dumps({"model": name, "rows": len(cache._index), "dim": cache.dim}))
@@ -0,0 +1,86 @@
+"""Persistent store of summary embeddings for NewsBlink backend."""
+import hashlib
+import logging
+import os
+import threading
+import numpy as np
+
+EMBEDDING_STORE_PATH = "backend/models/embedding_store.npz"
+
+
+def text_key(text):
+    """Stable key for a preprocessed text."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Embeddings keyed by a hash of the preprocessed text they were computed from.
+
+    Retraining looks rows up here and only sends new or changed texts to the
+    encoder, so its cost grows with the number of new rows rather than with
+    the size of the dataset.
+    """
+
+    def __init__(self, path=EMBEDDING_STORE_PATH):
+        self.path = path
+        self._index = {}
+        self._vectors = []
+        self._lock = threading.Lock()
+        self.load()
+
+    def __len__(self):
+        return len(self._index)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                keys = data["keys"].tolist()
+                vectors = data["vectors"].astype(np.float32)
+        except (OSError, KeyError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable embedding store {self.path}: {e}")
+            return
+        with self._lock:
+            self._index = {key: i for i, key in enumerate(keys)}
+            self._vectors = list(vectors)
+
+    def embed(self, texts, encode_fn):
+        """Return an (n, dim) float32 matrix for texts, encoding only unseen ones."""
+        keys = [text_key(text) for text in texts]
+        with self._lock:
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in self._index and key not in missing:
+                    missing[key] = text
+
+        if missing:
+            logging.info(f"Encoding {len(missing)} new text(s); {len(keys) - len(missing)} served from the embedding store")
+            encoded = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            with self._lock:
+                for key, vector in zip(missing.keys(), encoded):
+                    if key not in self._index:
+                        self._index[key] = len(self._vectors)
+                        self._vectors.append(vector)
+
+        with self._lock:
+            return np.stack([self._vectors[self._index[key]] for key in keys])
+
+    def save(self, keep_texts=None):
+        """Write the store atomically, optionally keeping only entries for keep_texts."""
+        with self._lock:
+            if keep_texts is not None:
+                keep = {text_key(text) for text in keep_texts}
+                keys = [key for key in self._index if key in keep]
+            else:
+                keys = list(self._index)
+            vectors = [self._vectors[self._index[key]] for key in keys]
+            self._index = {key: i for i, key in enumerate(keys)}
+            self._vectors = vectors
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            matrix = np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+            np.savez(f, keys=np.array(keys, dtype=str), vectors=matrix.astype(np.float32))
+        os.replace(tmp_path, self.path)
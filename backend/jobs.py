@@ -0,0 +1,139 @@
+"""Background job management for NewsBlink backend."""
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+try:
+    from .metrics import record_failure
+except ImportError:
+    from metrics import record_failure
+
+JOB_WORKERS = int(os.environ.get("NEWSBLINK_JOB_WORKERS", "2"))
+JOB_MAX_PENDING = int(os.environ.get("NEWSBLINK_JOB_MAX_PENDING", "32"))
+JOB_RETENTION_SECONDS = int(os.environ.get("NEWSBLINK_JOB_RETENTION", "3600"))
+
+
+class JobQueueFullError(Exception):
+    """Raised when too many jobs are already waiting for a worker."""
+
+
+class Job:
+    """A single pipeline run with per-stage status."""
+
+    def __init__(self, stages=()):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.stages = OrderedDict((name, {"status": "pending", "started_at": None, "finished_at": None})
+                                  for name in stages)
+        self.result = None
+        self.error = None
+        self.status_code = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.future = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Mark a pipeline stage as running for the duration of the block."""
+        with self._lock:
+            info = self.stages.setdefault(name, {"status": "pending", "started_at": None, "finished_at": None})
+            info["status"] = "running"
+            info["started_at"] = time.time()
+        try:
+            yield
+        except BaseException:
+            with self._lock:
+                info["status"] = "failed"
+                info["finished_at"] = time.time()
+            raise
+        with self._lock:
+            info["status"] = "done"
+            info["finished_at"] = time.time()
+
+    def skip_remaining(self):
+        """Mark stages that never started as skipped (e.g. after a cache hit)."""
+        with self._lock:
+            for info in self.stages.values():
+                if info["status"] == "pending":
+                    info["status"] = "skipped"
+
+    @property
+    def done(self):
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self):
+        with self._lock:
+            data = {
+                "job_id": self.id,
+                "status": self.status,
+                "stages": {name: dict(info) for name, info in self.stages.items()},
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+            }
+        if self.status == "succeeded":
+            data["result"] = self.result
+        elif self.status == "failed":
+            data["error"] = self.error
+            data["status_code"] = self.status_code
+        return data
+
+
+class JobManager:
+    """Runs jobs on a bounded worker pool and keeps finished jobs for polling."""
+
+    def __init__(self, max_workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING,
+                 retention_seconds=JOB_RETENTION_SECONDS):
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="newsblink-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, stages=()):
+        """Queue fn(job, *args) and return the Job immediately."""
+        self._prune()
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job.done)
+            if pending >= self.max_pending:
+                raise JobQueueFullError(f"Too many pending jobs ({pending}). Try again later.")
+            job = Job(stages)
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id):
+        self._prune()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_depth(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status == "queued")
+
+    def _run(self, job, fn, args):
+        job.status = "running"
+        try:
+            job.result = fn(job, *args)
+            job.status = "succeeded"
+        except Exception as e:
+            job.status_code = getattr(e, "status_code", 500)
+            job.error = getattr(e, "detail", None) or str(e)
+            job.status = "failed"
+            logging.error(f"Job {job.id} failed: {job.error}")
+            record_failure("job", e)
+        finally:
+            job.finished_at = time.time()
+        return job
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.done and job.finished_at is not None and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
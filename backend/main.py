@@ -1,25 +1,56 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+import time
+_import_started = time.perf_counter()
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
+from typing import List, Optional
 try:
-    from .modified_preprocessing import extract_youtube_transcript, summarize_text, clean_text
-    from .clustering import classify_new_summary, load_agnes_model, compute_confidence_score #, evaluate_clustering
+    from .modified_preprocessing import extract_youtube_transcript, extract_video_id, summarize_text, summarize_texts, clean_text, iter_chunk_summaries, postprocess_summary, fallback_summary, SUMMARY_TOKEN_BUDGET, MIN_TOKEN_BUDGET
+    from .clustering import classify_with_confidence, classify_batch #, evaluate_clustering
     from .utils import get_category_name
 except ImportError:
-    from modified_preprocessing import extract_youtube_transcript, summarize_text, clean_text
-    from clustering import classify_new_summary, load_agnes_model, compute_confidence_score #, evaluate_clustering
+    from modified_preprocessing import extract_youtube_transcript, extract_video_id, summarize_text, summarize_texts, clean_text, iter_chunk_summaries, postprocess_summary, fallback_summary, SUMMARY_TOKEN_BUDGET, MIN_TOKEN_BUDGET
+    from clustering import classify_with_confidence, classify_batch #, evaluate_clustering
     from utils import get_category_name
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import json
 import logging
 import os
-import pickle
-import pandas as pd
-from gtts import gTTS
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 try:
-    from .retrain_utils import retrain_model, DATASET_LOCK, DATASET_PATH
+    from .retrain_utils import retrain_model, DATASET_LOCK
+    from .dataset_store import get_dataset_store
+    from .result_cache import ResultCache, get_model_version
+    from .jobs import JobManager, JobQueueFullError
+    from .retrain_scheduler import RetrainScheduler
+    from .model_registry import registry, get_active_bundle
+    from .model_handles import record_timing, startup_report, warmup
+    from .tts import get_tts_service, AUDIO_DIR
+    from .batch_pipeline import BatchPipeline, BULK_MAX_VIDEOS
+    from .dedup_index import get_dedup_index
+    from .vector_index import get_vector_index, embed_for_index, notify_appended
+    from .transcript_fetcher import get_transcript_fetcher
+    from .metrics import Gauge, render as render_metrics, time_stage, record_failure, CONTENT_TYPE as METRICS_CONTENT_TYPE
 except ImportError:
-    from retrain_utils import retrain_model, DATASET_LOCK, DATASET_PATH
+    from retrain_utils import retrain_model, DATASET_LOCK
+    from dataset_store import get_dataset_store
+    from result_cache import ResultCache, get_model_version
+    from jobs import JobManager, JobQueueFullError
+    from retrain_scheduler import RetrainScheduler
+    from model_registry import registry, get_active_bundle
+    from model_handles import record_timing, startup_report, warmup
+    from tts import get_tts_service, AUDIO_DIR
+    from batch_pipeline import BatchPipeline, BULK_MAX_VIDEOS
+    from dedup_index import get_dedup_index
+    from vector_index import get_vector_index, embed_for_index, notify_appended
+    from transcript_fetcher import get_transcript_fetcher
+    from metrics import Gauge, render as render_metrics, time_stage, record_failure, CONTENT_TYPE as METRICS_CONTENT_TYPE
+
+record_timing("import:modules", time.perf_counter() - _import_started)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -36,7 +67,6 @@ app = FastAPI()
 app.mount("/static", StaticFiles(directory="static"), name="audio")
 
 # Ensure audio folder exists
-AUDIO_DIR = os.path.join("static", "audio")
 os.makedirs(AUDIO_DIR, exist_ok=True)
 
 app.add_middleware(
@@ -47,165 +77,618 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
-# Load AGNES model at startup
-agnes_model = load_agnes_model()
-if not agnes_model:
-    logging.warning("AGNES model not found. Please train it before classification!")
+# Models load lazily; set NEWSBLINK_WARMUP=0 to skip loading them in the background at startup
+WARMUP_ON_STARTUP = os.environ.get("NEWSBLINK_WARMUP", "1") != "0"
+
+# Cache of finished results, keyed by video ID and model version
+result_cache = ResultCache()
+
+# Bounded pool that runs the transcript -> summary -> TTS -> classify pipeline
+PIPELINE_STAGES = ("cache", "transcript", "summarize", "classify", "tts")
+job_manager = JobManager()
+
+# Dataset appends run one at a time, off the pipeline workers
+retrain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="newsblink-retrain")
+# Appends submitted and not finished yet (queued or running), for the queue depth gauge
+_appends_pending = 0
+_appends_pending_lock = threading.Lock()
+
+def _append_finished(future):
+    global _appends_pending
+    with _appends_pending_lock:
+        _appends_pending -= 1
+
+def submit_append(transcript, summary, category, confidence_score):
+    global _appends_pending
+    with _appends_pending_lock:
+        _appends_pending += 1
+    try:
+        future = retrain_executor.submit(append_and_retrain, transcript, summary, category, confidence_score)
+    except Exception:
+        _append_finished(None)
+        raise
+    future.add_done_callback(_append_finished)
+    return future
+
+# Appended rows are batched so a burst of requests triggers a single retrain
+retrain_scheduler = RetrainScheduler(retrain_model)
+
+def serving_model_info():
+    bundle = get_active_bundle()
+    return {(bundle.version,): 1} if bundle else {}
+
+# Read at scrape time by GET /metrics
+Gauge("newsblink_queue_depth", "Work waiting in each background queue.", ["queue"],
+      fn=lambda: {("jobs",): job_manager.queue_depth(),
+                  ("dataset_append",): _appends_pending,
+                  ("retrain_rows",): retrain_scheduler.queue_depth()})
+Gauge("newsblink_model_info", "The model version currently serving (value is always 1).", ["version"],
+      fn=serving_model_info)
+
+# Define confidence threshold for retraining (skip if below this threshold)
+CONFIDENCE_THRESHOLD = 20.0  # Skip retraining if confidence < 20%
 
-embeddings_model = "backend/models/embeddings.pkl"
-if os.path.exists(embeddings_model):
-        with open(embeddings_model, "rb") as f:
-            embed_model = pickle.load(f)
 class VideoRequest(BaseModel):
     url: str
+    # Max BART input tokens; long transcripts are reduced to their most salient sentences
+    token_budget: Optional[int] = None
+
+class BulkVideoRequest(BaseModel):
+    urls: List[str]
+    token_budget: Optional[int] = None
+
+class RelatedRequest(BaseModel):
+    # Either free text, or the URL of a video already processed with the same token budget
+    text: Optional[str] = None
+    url: Optional[str] = None
+    token_budget: Optional[int] = None
+    k: int = 5
+    # Only return stories from the query's predicted cluster
+    same_cluster: bool = False
 
 @app.get("/")
 def root():
     return {"message": "Welcome to the NewsBlink API"}
 
-@app.post("/process_video")
-def process_video(request: VideoRequest, background_tasks: BackgroundTasks):
+
+def warmup_models():
+    """Load every model now instead of on the first request."""
+    started = time.perf_counter()
+    # The AGNES model is picked up from the registry; later versions are hot-swapped without a restart
+    if get_active_bundle() is None:
+        logging.warning("AGNES model not found. Please train it before classification!")
+    report = warmup()
+    record_timing("warmup:total", time.perf_counter() - started)
+    logging.info(f"Warmup finished: {startup_report()['timings_seconds']}")
+    return report
+
+
+@app.on_event("startup")
+def start_warmup():
+    if WARMUP_ON_STARTUP:
+        threading.Thread(target=warmup_models, name="newsblink-warmup", daemon=True).start()
+
+
+@app.post("/warmup")
+def run_warmup():
+    """Explicitly load all models; returns the startup-time breakdown."""
+    warmup_models()
+    return startup_report()
+
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once every model is loaded, 503 before that."""
+    report = startup_report()
+    bundle = get_active_bundle()
+    report["model_version"] = bundle.version if bundle else None
+    report["ready"] = bundle is not None and all(model["loaded"] for model in report["models"].values())
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+def append_and_retrain(transcript, summary, category, confidence_score):
     try:
-        transcript = extract_youtube_transcript(request.url)
-        print(f"=== TRANSCRIPT EXTRACTED: {transcript[:100]}... ===")
-        logging.info(f"Transcript extracted: {transcript[:100]}...")
+        print("=== [BG] BACKGROUND TASK STARTED ===")
+        logging.info("[BG] Background task started: append and retrain.")
         
-        # Check if transcript extraction failed
-        if not transcript or len(transcript) < 50:
-            print("=== TRANSCRIPT EXTRACTION FAILED ===")
-            raise HTTPException(status_code=400, detail="Transcript extraction failed or transcript too short.")
+        # Check confidence threshold before proceeding
+        if confidence_score < CONFIDENCE_THRESHOLD:
+            print(f"=== [BG] SKIPPING RETRAINING: Confidence {confidence_score}% is below threshold {CONFIDENCE_THRESHOLD}% ===")
+            logging.info(f"[BG] Skipping retraining: Confidence {confidence_score}% is below threshold {CONFIDENCE_THRESHOLD}%")
+            return
         
-        # Check if transcript contains actual error messages (more specific patterns)
-        error_indicators = [
-            "transcript extraction failed",
-            "no transcript available",
-            "video unavailable", 
-            "transcripts disabled",
-            "network error",
-            "connection timeout",
-            "ssl error",
-            "max retries exceeded"
-        ]
-        if any(indicator in transcript.lower() for indicator in error_indicators):
-            print("=== TRANSCRIPT CONTAINS ERROR MESSAGES ===")
-            raise HTTPException(status_code=400, detail="Transcript extraction failed due to network or access issues.")
+        store = get_dataset_store()
+        dedup_index = get_dedup_index()
+        with DATASET_LOCK:
+            # Prevent duplication: exact hash lookup, then MinHash/LSH for near-identical re-uploads
+            duplicate = dedup_index.check(transcript)
+            if duplicate:
+                print(f"=== [BG] {duplicate.kind.upper()} DUPLICATE TRANSCRIPT DETECTED ===")
+                logging.info(f"[BG] {duplicate.kind.capitalize()} duplicate of dataset row {duplicate.row} "
+                             f"(similarity {duplicate.similarity:.2f}). Skipping append and retrain.")
+                return
+            with time_stage("dataset_append"):
+                row = store.append(transcript, summary, category)
+                dedup_index.add(transcript, row)
+            print("=== [BG] NEW ROW APPENDED TO DATASET ===")
+            logging.info("[BG] New row appended to dataset.")
+            retrain_scheduler.notify()
+            logging.info(f"[BG] Retraining scheduled ({retrain_scheduler.queue_depth()} row(s) pending).")
+        # The new story can be returned by /related before the next retrain. Embedding it
+        # happens outside DATASET_LOCK so it does not hold up other appends.
+        notify_appended(get_active_bundle())
+    except Exception as e:
+        print(f"=== [BG] ERROR: {e} ===")
+        logging.error(f"[BG] Error in background append/retrain: {e}")
+        record_failure("dataset_append", e)
+
+
+def resolve_token_budget(token_budget):
+    """Effective summary token budget for a request (0: no budget)."""
+    if token_budget is None:
+        token_budget = SUMMARY_TOKEN_BUDGET
+    return max(MIN_TOKEN_BUDGET, token_budget) if token_budget > 0 else 0
+
+
+def result_version(bundle, token_budget):
+    """Result cache version: the models, plus the token budget when one was applied."""
+    model_version = get_model_version(bundle.version if bundle else None)
+    return f"{model_version}-budget{token_budget}" if token_budget else model_version
+
+
+def lookup_cached_result(video_id, model_version):
+    """Cached result for a video if it is still valid (its audio file still exists)."""
+    cached = result_cache.get(video_id, model_version) if video_id else None
+    if not cached or not os.path.exists(os.path.join(AUDIO_DIR, os.path.basename(cached["audio_url"]))):
+        return None
+    logging.info(f"Serving cached result for video {video_id} (model {model_version})")
+    cached["retraining_status"] = "skipped"
+    cached["retraining_note"] = "Retraining skipped because this video was already processed (cached result)"
+    return cached
+
+
+def fetch_transcript(url):
+    """Fetch a transcript, raising a 400 if extraction failed."""
+    transcript = extract_youtube_transcript(url)
+    print(f"=== TRANSCRIPT EXTRACTED: {transcript[:100]}... ===")
+    logging.info(f"Transcript extracted: {transcript[:100]}...")
+    
+    # Check if transcript extraction failed
+    if not transcript or len(transcript) < 50:
+        print("=== TRANSCRIPT EXTRACTION FAILED ===")
+        raise HTTPException(status_code=400, detail="Transcript extraction failed or transcript too short.")
+    
+    # Check if transcript contains actual error messages (more specific patterns)
+    error_indicators = [
+        "transcript extraction failed",
+        "no transcript available",
+        "video unavailable", 
+        "transcripts disabled",
+        "network error",
+        "connection timeout",
+        "ssl error",
+        "max retries exceeded"
+    ]
+    if any(indicator in transcript.lower() for indicator in error_indicators):
+        print("=== TRANSCRIPT CONTAINS ERROR MESSAGES ===")
+        raise HTTPException(status_code=400, detail="Transcript extraction failed due to network or access issues.")
+    return transcript
+
+
+def start_audio(summary):
+    """Start converting the summary to speech; sentences are synthesized in parallel."""
+    # Audio is named by a hash of the text, so identical summaries reuse one file
+    # and concurrent requests never overwrite each other's audio
+    return get_tts_service().synthesize_progressive(summary, lang='en')
+
+
+def audio_urls(audio):
+    """URLs for the joined file, the progressive stream and the HLS playlist."""
+    return {
+        "audio_url": f"/static/audio/{audio.file_name}",
+        "audio_stream_url": f"/audio/{audio.key}/stream",
+        "audio_playlist_url": f"/audio/{audio.key}/playlist.m3u8",
+    }
+
+
+def classify_summary(cleaned_summary, bundle):
+    """Cluster, category and confidence of a cleaned summary under the given model."""
+    if bundle is None:
+        raise HTTPException(status_code=500, detail="AGNES model is not trained. Please train it first!")
+
+    # Single encode gives the cluster, its confidence score and the runner-up clusters
+    classification = classify_with_confidence(cleaned_summary, bundle=bundle)
+    classification["category"] = get_category_name(classification["cluster"], bundle)
+    
+    # Log cluster information for debugging
+    logging.info(f"Cluster ID: {classification['cluster']}, Category: {classification['category']}, Top clusters: {classification['top_clusters']}")
+    return classification
+
+
+def build_result(url, transcript, summary, audio, classification, bundle):
+    """Assemble the response and schedule the dataset append/retrain."""
+    category = classification["category"]
+    confidence_score = classification["confidence"]
+
+    # Add confidence label for better user interpretation
+    if confidence_score >= 80:
+        confidence_label = "Very High"
+    elif confidence_score >= 60:
+        confidence_label = "High"
+    elif confidence_score >= 40:
+        confidence_label = "Moderate"
+    elif confidence_score >= 20:
+        confidence_label = "Low"
+    else:
+        confidence_label = "Very Low"
         
-        summary = summarize_text(transcript)
+    # Add explanation for user understanding
+    if confidence_score >= 80:
+        confidence_explanation = f"This score indicates how similar the content is to typical {category} news. Very high confidence means the content is very similar to typical {category} content."
+    elif confidence_score >= 60:
+        confidence_explanation = f"This score indicates how similar the content is to typical {category} news. High confidence means the content is quite similar to typical {category} content."
+    elif confidence_score >= 40:
+        confidence_explanation = f"This score indicates how similar the content is to typical {category} news. Moderate confidence means the content has reasonable similarity to typical {category} content."
+    elif confidence_score >= 20:
+        confidence_explanation = f"This score indicates how similar the content is to typical {category} news. Low confidence means the content is somewhat different from typical {category} content, but still classified in this category."
+    else:
+        confidence_explanation = f"This score indicates how similar the content is to typical {category} news. Very low confidence means the content is quite different from typical {category} content, but was still classified in this category."
+
+    # Determine if we should retrain based on confidence
+    should_retrain = confidence_score >= CONFIDENCE_THRESHOLD
+    retraining_note = f"Retraining {'skipped' if not should_retrain else 'scheduled'} due to {'low confidence' if not should_retrain else 'sufficient confidence'} ({confidence_score}% vs {CONFIDENCE_THRESHOLD}% threshold)"
+    duplicate = get_dedup_index().check(transcript) if should_retrain else None
+    if duplicate:
+        should_retrain = False
+        retraining_note = f"Retraining skipped because this transcript is {'already' if duplicate.kind == 'exact' else 'a near-duplicate of a transcript'} in the dataset ({round(duplicate.similarity * 100, 2)}% similar)"
+    if should_retrain:
+        submit_append(transcript, summary, category, confidence_score)
+
+    logging.info(f"Processed video for URL: {url} | Category: {category} | Confidence: {confidence_score}% | Retraining: {'scheduled' if should_retrain else 'skipped'}")
+    return {
+        "summary": summary,
+        "category": category,
+        "messege":"Audio generated successfully",
+        "audio_url":audio["audio_url"],
+        "audio_stream_url": audio["audio_stream_url"],
+        "audio_playlist_url": audio["audio_playlist_url"],
+        "confidence_score": f"{confidence_score}%",
+        "confidence_label": confidence_label,
+        "confidence_explanation": confidence_explanation,
+        "top_categories": [{"category": get_category_name(cluster, bundle), "similarity": f"{round(similarity * 100, 2)}%"} for cluster, similarity in classification["top_clusters"]],
+        "model_version": bundle.version,
+        "retraining_status": "skipped" if not should_retrain else "scheduled",
+        "retraining_note": retraining_note
+    }
+
+
+def run_video_pipeline(job, url, token_budget=0):
+    """Run every processing stage for one video, reporting progress on the job."""
+    video_id = extract_video_id(url)
+    # Hold on to one model version for the whole request, even if a retrain publishes a new one
+    bundle = get_active_bundle()
+    model_version = result_version(bundle, token_budget)
+    with job.stage("cache"):
+        cached = lookup_cached_result(video_id, model_version)
+    if cached:
+        job.skip_remaining()
+        return cached
+
+    with job.stage("transcript"):
+        transcript = fetch_transcript(url)
+    
+    with job.stage("summarize"):
+        summary = summarize_text(transcript, token_budget=token_budget)
         print(f"=== SUMMARY GENERATED: {summary} ===")
         logging.info(f"Summary generated: {summary}")
         cleaned_summary = clean_text(summary)
-        
-        # Always use the same file name
-        file_name = "summary.mp3"
-        file_path = os.path.join(AUDIO_DIR, file_name)
+    
+    # Speech synthesis runs in the TTS pool while the summary is classified
+    audio = start_audio(summary)
 
-        # Convert text to speech
-        tts = gTTS(text=summary, lang='en')
-        tts.save(file_path)
-        
-        #Return URL to frontend
-        audio_url = f"/static/audio/{file_name}"
+    with job.stage("classify"):
+        classification = classify_summary(cleaned_summary, bundle)
 
-        if not agnes_model:
-            raise HTTPException(status_code=500, detail="AGNES model is not trained. Please train it first!")
+    with job.stage("tts"):
+        audio.wait()
 
-        predicted_cluster = classify_new_summary(cleaned_summary)
-        category = get_category_name(predicted_cluster)
-        
-        # Log cluster information for debugging
-        logging.info(f"Cluster ID: {predicted_cluster}, Category: {category}")
-        
-        # Compute confidence score
-        confidence_score = compute_confidence_score(cleaned_summary, predicted_cluster)
-        
-        # Add confidence label for better user interpretation
-        if confidence_score >= 80:
-            confidence_label = "Very High"
-        elif confidence_score >= 60:
-            confidence_label = "High"
-        elif confidence_score >= 40:
-            confidence_label = "Moderate"
-        elif confidence_score >= 20:
-            confidence_label = "Low"
-        else:
-            confidence_label = "Very Low"
-            
-        # Add explanation for user understanding
-        if confidence_score >= 80:
-            confidence_explanation = f"This score indicates how similar the content is to typical {category} news. Very high confidence means the content is very similar to typical {category} content."
-        elif confidence_score >= 60:
-            confidence_explanation = f"This score indicates how similar the content is to typical {category} news. High confidence means the content is quite similar to typical {category} content."
-        elif confidence_score >= 40:
-            confidence_explanation = f"This score indicates how similar the content is to typical {category} news. Moderate confidence means the content has reasonable similarity to typical {category} content."
-        elif confidence_score >= 20:
-            confidence_explanation = f"This score indicates how similar the content is to typical {category} news. Low confidence means the content is somewhat different from typical {category} content, but still classified in this category."
-        else:
-            confidence_explanation = f"This score indicates how similar the content is to typical {category} news. Very low confidence means the content is quite different from typical {category} content, but was still classified in this category."
+    result = build_result(url, transcript, summary, audio_urls(audio), classification, bundle)
+    if video_id:
+        result_cache.put(video_id, model_version, result)
+    return result
 
-        # Define confidence threshold for retraining (skip if below this threshold)
-        CONFIDENCE_THRESHOLD = 20.0  # Skip retraining if confidence < 20%
-        
-        # Determine if we should retrain based on confidence
-        should_retrain = confidence_score >= CONFIDENCE_THRESHOLD
-
-        def append_and_retrain():
-            try:
-                print("=== [BG] BACKGROUND TASK STARTED ===")
-                logging.info("[BG] Background task started: append and retrain.")
-                
-                # Check confidence threshold before proceeding
-                if not should_retrain:
-                    print(f"=== [BG] SKIPPING RETRAINING: Confidence {confidence_score}% is below threshold {CONFIDENCE_THRESHOLD}% ===")
-                    logging.info(f"[BG] Skipping retraining: Confidence {confidence_score}% is below threshold {CONFIDENCE_THRESHOLD}%")
-                    return
-                
-                with DATASET_LOCK:
-                    df = pd.read_excel(DATASET_PATH)
-                    # Check for expected columns
-                    expected_col = 'NEWS (Full Transcript)'
-                    if expected_col not in df.columns:
-                        print(f"=== [BG] COLUMN NOT FOUND: {expected_col} ===")
-                        logging.warning(f"[BG] Expected column '{expected_col}' not found in dataset. Columns: {df.columns.tolist()}")
-                        return
-                    # Prevent duplication: check if transcript already exists
-                    if (df[expected_col] == transcript).any():
-                        print("=== [BG] DUPLICATE TRANSCRIPT DETECTED ===")
-                        logging.info("[BG] Duplicate transcript detected. Skipping append.")
-                    else:
-                        new_row = {expected_col: transcript, "Summary": summary, "Category": category}
-                        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-                        df.to_excel(DATASET_PATH, index=False)
-                        print("=== [BG] NEW ROW APPENDED TO DATASET ===")
-                        logging.info("[BG] New row appended to dataset.")
-                print("=== [BG] STARTING MODEL RETRAINING ===")
-                logging.info("[BG] Starting model retraining...")
-                retrain_model()
-                print("=== [BG] MODEL RETRAINING COMPLETED ===")
-                logging.info("[BG] Model retraining completed.")
-            except Exception as e:
-                print(f"=== [BG] ERROR: {e} ===")
-                logging.error(f"[BG] Error in background append/retrain: {e}")
-
-        background_tasks.add_task(append_and_retrain)
-
-        logging.info(f"Processed video for URL: {request.url} | Category: {category} | Confidence: {confidence_score}% | Retraining: {'scheduled' if should_retrain else 'skipped'}")
-        return {
-            "summary": summary,
-            "category": category,
-            "messege":"Audio generated successfully",
-            "audio_url":audio_url,
-            "confidence_score": f"{confidence_score}%",
-            "confidence_label": confidence_label,
-            "confidence_explanation": confidence_explanation,
-            "retraining_status": "skipped" if not should_retrain else "scheduled",
-            "retraining_note": f"Retraining {'skipped' if not should_retrain else 'scheduled'} due to {'low confidence' if not should_retrain else 'sufficient confidence'} ({confidence_score}% vs {CONFIDENCE_THRESHOLD}% threshold)"
-        }
 
+def stream_video_events(url, token_budget=0):
+    """Yield pipeline events for one video as each stage finishes."""
+    try:
+        video_id = extract_video_id(url)
+        bundle = get_active_bundle()
+        model_version = result_version(bundle, token_budget)
+        cached = lookup_cached_result(video_id, model_version)
+        if cached:
+            yield {"event": "result", "cached": True, "result": cached}
+            return
+
+        transcript = fetch_transcript(url)
+        yield {"event": "transcript", "video_id": video_id, "length": len(transcript)}
+
+        chunk_summaries = []
+        for index, total, chunk_summary in iter_chunk_summaries(transcript, token_budget=token_budget):
+            if chunk_summary:
+                chunk_summaries.append(chunk_summary)
+            yield {"event": "chunk", "index": index, "total": total, "summary": chunk_summary}
+        summary = postprocess_summary(" ".join(chunk_summaries)) if chunk_summaries else fallback_summary(transcript)
+        logging.info(f"Summary generated: {summary}")
+        yield {"event": "summary", "summary": summary}
+
+        # Clients can start playing the stream or playlist before synthesis finishes
+        audio = start_audio(summary)
+        yield {"event": "audio_started", **audio_urls(audio)}
+
+        classification = classify_summary(clean_text(summary), bundle)
+        yield {"event": "classification", "category": classification["category"],
+               "confidence_score": f"{classification['confidence']}%"}
+
+        audio.wait()
+        yield {"event": "audio", **audio_urls(audio)}
+
+        result = build_result(url, transcript, summary, audio_urls(audio), classification, bundle)
+        if video_id:
+            result_cache.put(video_id, model_version, result)
+        yield {"event": "result", "cached": False, "result": result}
     except Exception as e:
-        logging.error(f"Error processing video: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logging.error(f"Error streaming video: {str(e)}")
+        record_failure("process_video_stream", e)
+        yield {"event": "error", "status_code": getattr(e, "status_code", 500), "detail": getattr(e, "detail", None) or str(e)}
+
+
+def bulk_fetch(state):
+    """Bulk stage 1: cache lookup and transcript download for one video."""
+    state["video_id"] = extract_video_id(state["url"])
+    cached = lookup_cached_result(state["video_id"], state["model_version"])
+    if cached:
+        state["result"] = cached
+        return
+    state["transcript"] = fetch_transcript(state["url"])
+
+
+def bulk_summarize(states):
+    """Bulk stage 2: summarize several transcripts with their chunks batched together."""
+    # All states of one bulk request share its token budget
+    summaries = summarize_texts([state["transcript"] for state in states], token_budget=states[0]["token_budget"])
+    for state, summary in zip(states, summaries):
+        state["summary"] = summary
+        # Speech synthesis runs in the TTS pool while the batch is classified
+        state["audio"] = start_audio(summary)
+
+
+def bulk_classify(states):
+    """Bulk stage 3: classify several summaries with one encode call."""
+    bundle = states[0]["bundle"]
+    if bundle is None:
+        raise HTTPException(status_code=500, detail="AGNES model is not trained. Please train it first!")
+    classifications = classify_batch([clean_text(state["summary"]) for state in states], bundle=bundle)
+    for state, classification in zip(states, classifications):
+        classification["category"] = get_category_name(classification["cluster"], bundle)
+        state["classification"] = classification
+
+
+def bulk_finish(state):
+    """Bulk stage 4: wait for the audio, build the result and cache it."""
+    state["audio"].wait()
+    result = build_result(state["url"], state["transcript"], state["summary"], audio_urls(state["audio"]),
+                          state["classification"], state["bundle"])
+    if state["video_id"]:
+        result_cache.put(state["video_id"], state["model_version"], result)
+    return result
+
+
+bulk_pipeline = BatchPipeline(bulk_fetch, bulk_summarize, bulk_classify, bulk_finish)
+
+
+def stream_bulk_events(urls, token_budget=0):
+    """Yield one result or error event per video as it finishes, then a summary event."""
+    # One model version for the whole batch
+    bundle = get_active_bundle()
+    model_version = result_version(bundle, token_budget)
+    states = [{"index": index, "url": url, "bundle": bundle, "model_version": model_version,
+               "token_budget": token_budget}
+              for index, url in enumerate(urls)]
+    succeeded = 0
+    for state, result, error in bulk_pipeline.run(states):
+        if error is None:
+            succeeded += 1
+            yield {"event": "result", "index": state["index"], "url": state["url"],
+                   "cached": "transcript" not in state, "result": result}
+        else:
+            logging.error(f"Bulk processing failed for {state['url']}: {error}")
+            record_failure("process_videos", error)
+            yield {"event": "error", "index": state["index"], "url": state["url"],
+                   "status_code": getattr(error, "status_code", 500),
+                   "detail": getattr(error, "detail", None) or str(error)}
+    yield {"event": "done", "total": len(states), "succeeded": succeeded, "failed": len(states) - succeeded}
+
+
+def submit_video_job(request):
+    try:
+        return job_manager.submit(run_video_pipeline, request.url, resolve_token_budget(request.token_budget),
+                                  stages=PIPELINE_STAGES)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@app.post("/jobs", status_code=202)
+def create_job(request: VideoRequest):
+    """Queue a video for processing and return its job ID immediately."""
+    job = submit_video_job(request)
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Per-stage status of a job, plus its result or error once finished."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return job.to_dict()
+
+
+@app.get("/metrics")
+def metrics():
+    """Stage latencies, cache and failure counters, queue depths and model info for Prometheus."""
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/retrain/status")
+def retrain_status():
+    """Pending rows and statistics of the last scheduled retrain."""
+    return retrain_scheduler.stats()
+
+
+@app.get("/models")
+def list_models():
+    """Published model versions and the one currently serving."""
+    bundle = get_active_bundle()
+    return {"current": bundle.version if bundle else None, "versions": registry.list_versions()}
+
+
+@app.post("/models/rollback")
+def rollback_model(version: Optional[str] = None):
+    """Serve the given model version, or the one before the current version."""
+    try:
+        version = registry.rollback(version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    bundle = get_active_bundle(force_check=True)
+    return {"current": bundle.version if bundle else version}
+
+
+RELATED_MAX_K = 50
+
+
+def related_query(request, bundle):
+    """(query text, dataset rows to leave out) for a /related request."""
+    if request.text and request.text.strip():
+        return request.text, []
+    if not request.url:
+        raise HTTPException(status_code=400, detail="Provide either text or url.")
+    video_id = extract_video_id(request.url)
+    cached = result_cache.get(video_id, result_version(bundle, resolve_token_budget(request.token_budget))) if video_id else None
+    if not cached:
+        raise HTTPException(status_code=404, detail="Video has not been processed with the current model. Process it first.")
+    # A video that was appended to the dataset would otherwise be its own closest story
+    transcript = get_transcript_fetcher().store.get(video_id)
+    duplicate = get_dedup_index().check(transcript) if transcript else None
+    return cached["summary"], [duplicate.row] if duplicate and duplicate.row is not None else []
+
+
+@app.post("/related")
+def related_stories(request: RelatedRequest):
+    """Stored stories most similar to a processed video or to free text."""
+    bundle = get_active_bundle()
+    if bundle is None:
+        raise HTTPException(status_code=500, detail="AGNES model is not trained. Please train it first!")
+    text, exclude_rows = related_query(request, bundle)
+    k = max(1, min(request.k, RELATED_MAX_K))
+
+    index = get_vector_index(bundle)
+    query = embed_for_index([text])[0]
+    cluster = index.nearest_cluster(query)
+    matches = index.search(query, k, cluster=cluster if request.same_cluster else None, exclude_rows=exclude_rows)
+    stories = get_dataset_store().read_rows([row for row, _, _ in matches], ["Summary", "Category"])
+    return {
+        "model_version": bundle.version,
+        "query_category": get_category_name(cluster, bundle),
+        "index": {"mode": index.mode, "size": len(index)},
+        "related": [{
+            "row": row,
+            "summary": stories[row]["Summary"],
+            "category": stories[row]["Category"],
+            "cluster_category": get_category_name(story_cluster, bundle),
+            "similarity": f"{round(similarity * 100, 2)}%",
+        } for row, similarity, story_cluster in matches if row in stories],
+    }
+
+
+@app.get("/audio/{key}/stream")
+def stream_audio(key: str):
+    """MP3 audio sent segment by segment as soon as each sentence is synthesized."""
+    audio = get_tts_service().get_audio(key)
+    if audio is None:
+        raise HTTPException(status_code=404, detail="Audio not found or expired.")
+    return StreamingResponse(audio.iter_bytes(), media_type="audio/mpeg",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/audio/{key}/playlist.m3u8")
+def audio_playlist(key: str):
+    """HLS playlist of the segments synthesized so far; players re-fetch it until it ends."""
+    audio = get_tts_service().get_audio(key)
+    if audio is None:
+        raise HTTPException(status_code=404, detail="Audio not found or expired.")
+    return PlainTextResponse(audio.playlist(), media_type="application/vnd.apple.mpegurl",
+                             headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/process_video/stream")
+def process_video_stream(request: VideoRequest, format: str = "ndjson"):
+    """Stream transcript, per-chunk summary, classification and audio events.
+
+    format=ndjson (default) sends one JSON object per line; format=sse sends
+    Server-Sent Events.
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    def encode_events():
+        for event in stream_video_events(request.url, resolve_token_budget(request.token_budget)):
+            if format == "sse":
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            else:
+                yield json.dumps(event) + "\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(encode_events(), media_type=media_type,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.post("/process_videos")
+def process_videos(request: BulkVideoRequest, format: str = "ndjson"):
+    """Process a list of videos, streaming each result as soon as that video is done.
+
+    Transcripts are fetched concurrently, summaries and classifications are
+    batched across videos, and TTS runs in its own pool. Events carry the
+    video's index in the request; format is ndjson (default) or sse.
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="urls must not be empty")
+    if len(request.urls) > BULK_MAX_VIDEOS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_VIDEOS} videos per request")
+
+    def encode_events():
+        for event in stream_bulk_events(request.urls, resolve_token_budget(request.token_budget)):
+            if format == "sse":
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            else:
+                yield json.dumps(event) + "\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(encode_events(), media_type=media_type,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.post("/process_video")
+async def process_video(request: VideoRequest):
+    job = submit_video_job(request)
+    await asyncio.wrap_future(job.future)
+    if job.status != "succeeded":
+        logging.error(f"Error processing video: {job.error}")
+        raise HTTPException(status_code=job.status_code or 500, detail=job.error)
+    return job.result
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
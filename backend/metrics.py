@@ -0,0 +1,208 @@
+"""Process-wide metrics for NewsBlink backend, in Prometheus text format.
+
+Three kinds of metric, each optionally labelled:
+
+- Counter: only goes up (cache lookups, failures by error type)
+- Gauge: a value set directly, or read from a callback at scrape time
+  (queue depths, model load times, the serving model version)
+- Histogram: observations counted into cumulative buckets (stage latency)
+
+Instrumented code uses the shared metrics below, e.g.
+
+    with time_stage("encode"):
+        ...
+
+and GET /metrics returns render(). Nothing here depends on
+prometheus_client; the exposition format is simple enough to write directly.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    from .model_handles import startup_report
+except ImportError:
+    from model_handles import startup_report
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; spans cache hits (ms) to retrains (minutes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+REGISTRY = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            REGISTRY.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        with self._lock:
+            return [(self.name, key, (), value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, key, extra, value in self._samples():
+            lines.append(f"{name}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """A set() value, or the result of fn() at scrape time.
+
+    fn returns a number for an unlabelled gauge, or {label values tuple: number}.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), fn=None):
+        super().__init__(name, documentation, labelnames)
+        self.fn = fn
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _samples(self):
+        if self.fn is None:
+            return super()._samples()
+        try:
+            values = self.fn()
+        except Exception:
+            return []  # a failing callback must not break the whole scrape
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [(self.name, tuple(str(v) for v in key), (), value)
+                for key, value in sorted(values.items()) if value is not None]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the block (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        samples = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state["counts"]):
+                    cumulative += count
+                    samples.append((f"{self.name}_bucket", key, (("le", _format_value(bound)),), cumulative))
+                samples.append((f"{self.name}_sum", key, (), state["sum"]))
+                samples.append((f"{self.name}_count", key, (), cumulative))
+        return samples
+
+
+def render():
+    """Every registered metric in Prometheus text exposition format."""
+    with _registry_lock:
+        metrics = list(REGISTRY)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "newsblink_stage_seconds",
+    "Latency of a processing stage in seconds (bart_generate is per chunk).",
+    ["stage"])
+CACHE_REQUESTS = Counter(
+    "newsblink_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ["cache", "result"])
+FAILURES = Counter(
+    "newsblink_failures_total",
+    "Failed operations by stage and error type.",
+    ["stage", "error"])
+
+
+def _load_seconds():
+    return {(name[len("load:"):],): seconds for name, seconds in startup_report()["timings_seconds"].items()
+            if name.startswith("load:")}
+
+
+MODEL_LOAD_SECONDS = Gauge(
+    "newsblink_model_load_seconds",
+    "Seconds the last load of each model took.",
+    ["model"], fn=_load_seconds)
+
+
+def time_stage(stage):
+    return STAGE_SECONDS.time(stage=stage)
+
+
+def record_cache(cache, hit, count=1):
+    if count:
+        CACHE_REQUESTS.inc(count, cache=cache, result="hit" if hit else "miss")
+
+
+def record_failure(stage, error):
+    """Count a failure; errors carrying an HTTP status (HTTPException) are labelled with it."""
+    error_type = type(error).__name__
+    status_code = getattr(error, "status_code", None)
+    FAILURES.inc(stage=stage, error=f"{error_type}:{status_code}" if status_code else error_type)
@@ -0,0 +1,137 @@
+"""Lazily loaded model handles for NewsBlink backend.
+
+Heavy models (BART, MiniLM, NLTK corpora) are loaded on first use instead of
+at import time, so the API process starts quickly and can report readiness.
+Every load is timed and recorded in STARTUP_TIMINGS.
+
+NEWSBLINK_QUANTIZE=1 loads BART and MiniLM with PyTorch dynamic int8
+quantization of their Linear layers (CPU only; compare accuracy and latency
+with backend/benchmark_quantization.py first). NEWSBLINK_TORCH_THREADS and
+NEWSBLINK_TORCH_INTEROP_THREADS set torch's intra-op and inter-op thread
+pools; 0 keeps torch's defaults.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+QUANTIZE = os.environ.get("NEWSBLINK_QUANTIZE", "0").lower() in ("1", "true", "int8")
+TORCH_THREADS = int(os.environ.get("NEWSBLINK_TORCH_THREADS", "0"))
+TORCH_INTEROP_THREADS = int(os.environ.get("NEWSBLINK_TORCH_INTEROP_THREADS", "0"))
+
+STARTUP_TIMINGS = OrderedDict()
+HANDLES = OrderedDict()
+_timings_lock = threading.Lock()
+
+
+def record_timing(name, seconds):
+    with _timings_lock:
+        STARTUP_TIMINGS[name] = round(seconds, 3)
+
+
+class LazyModel:
+    """Thread-safe handle that builds its value once, on first get()."""
+
+    def __init__(self, name, loader):
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._value = None
+        self.loaded = False
+        self.error = None
+        HANDLES[name] = self
+
+    def get(self):
+        if self.loaded:
+            return self._value
+        with self._lock:
+            if not self.loaded:
+                started = time.perf_counter()
+                try:
+                    self._value = self._loader()
+                except Exception as e:
+                    self.error = str(e)
+                    logging.error(f"Failed to load {self.name}: {e}")
+                    raise
+                self.error = None
+                self.loaded = True
+                record_timing(f"load:{self.name}", time.perf_counter() - started)
+                logging.info(f"Loaded {self.name} in {STARTUP_TIMINGS[f'load:{self.name}']}s")
+        return self._value
+
+
+_torch_configured = False
+
+
+def configure_torch():
+    """Apply the torch thread settings once, before the first model is loaded."""
+    global _torch_configured
+    with _timings_lock:
+        if _torch_configured:
+            return
+        _torch_configured = True
+    import torch
+
+    if TORCH_THREADS > 0:
+        torch.set_num_threads(TORCH_THREADS)
+    if TORCH_INTEROP_THREADS > 0:
+        try:
+            torch.set_num_interop_threads(TORCH_INTEROP_THREADS)
+        except RuntimeError as e:
+            # Only allowed before any inter-op work has started
+            logging.warning(f"Could not set torch inter-op threads: {e}")
+    logging.info(f"torch threads: intra-op {torch.get_num_threads()}, inter-op {torch.get_num_interop_threads()}")
+
+
+def quantize_linear_layers(model):
+    """Dynamic int8 quantization of every torch.nn.Linear in model, in place."""
+    import torch
+
+    started = time.perf_counter()
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    logging.info(f"Quantized {type(model).__name__} to int8 in {time.perf_counter() - started:.1f}s")
+    return model
+
+
+NLTK_RESOURCES = [
+    ("corpora/stopwords", "stopwords"),
+    ("tokenizers/punkt", "punkt"),
+    ("corpora/wordnet", "wordnet"),
+    ("tokenizers/punkt_tab", "punkt_tab"),
+]
+
+
+def ensure_nltk_data():
+    """Download NLTK corpora only if they are not already installed."""
+    import nltk
+
+    for path, package in NLTK_RESOURCES:
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            nltk.download(package, quiet=True)
+    return True
+
+
+nltk_data = LazyModel("nltk_data", ensure_nltk_data)
+
+
+def warmup(names=None):
+    """Load the given handles (default: all registered) and return the report."""
+    for name, handle in list(HANDLES.items()):
+        if names is None or name in names:
+            try:
+                handle.get()
+            except Exception:
+                pass
+    return startup_report()
+
+
+def startup_report():
+    with _timings_lock:
+        timings = dict(STARTUP_TIMINGS)
+    return {
+        "models": {name: {"loaded": handle.loaded, "error": handle.error} for name, handle in HANDLES.items()},
+        "timings_seconds": timings,
+    }
@@ -0,0 +1,447 @@
+"""Versioned model registry for NewsBlink backend.
+
+Each retrain publishes the clustering model and its cluster -> category
+mapping together as a new version directory under REGISTRY_DIR. A version is
+written to a temporary directory first and renamed into place, and the
+CURRENT pointer is swapped with os.replace, so readers never see a torn model.
+Serving code calls get_active_bundle() per request; it notices a new CURRENT
+and swaps in the new bundle while requests already holding the old one finish.
+
+A version directory holds one .npy file per array (centroids, labels,
+embeddings) and a manifest.json with the embedding model name, dimensions,
+cluster count, category mapping and a SHA-256 per array. Loading a version
+reads the manifest and the centroids; labels and embeddings are memory-mapped
+only when something (evaluation, for example) asks for them. Nothing is
+unpickled while serving. Models pickled by older releases are converted once
+with:
+
+    python backend/model_registry.py convert
+
+A fresh checkout has no registry (it is not versioned), so the first lookup
+copies the artifact committed under SEED_DIR in as version v000001. After a
+retrain worth shipping, refresh the seed with:
+
+    python backend/model_registry.py seed
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+try:
+    from .model_handles import record_timing
+except ImportError:
+    from model_handles import record_timing
+
+REGISTRY_DIR = os.environ.get("NEWSBLINK_MODEL_REGISTRY", "backend/models/registry")
+LEGACY_MODEL_PATH = "backend/models/agnes_model.pkl"
+LEGACY_MAPPING_PATH = "backend/models/cluster_category_mapping.pkl"
+# Committed artifact (same layout as a version directory) that bootstraps an empty registry
+SEED_DIR = os.environ.get("NEWSBLINK_MODEL_SEED", "backend/models/seed")
+# Pickle file names in version directories written before the artifact format
+MODEL_FILE = "agnes_model.pkl"
+MAPPING_FILE = "cluster_category_mapping.pkl"
+MANIFEST_FILE = "manifest.json"
+ARTIFACT_FORMAT = 2
+# Embedding model assumed for pickles that don't record one
+LEGACY_EMBEDDING_MODEL = "paraphrase-MiniLM-L6-v2"
+ARRAY_DTYPES = {"centroids": np.float32, "labels": np.int32, "embeddings": np.float32}
+# Arrays read into memory when a version is loaded; the rest are mapped on first use
+EAGER_ARRAYS = ("centroids",)
+KEEP_VERSIONS = int(os.environ.get("NEWSBLINK_MODEL_KEEP_VERSIONS", "5"))
+RELOAD_CHECK_SECONDS = float(os.environ.get("NEWSBLINK_MODEL_RELOAD_CHECK", "2"))
+
+
+class ModelFormatError(ValueError):
+    """A version directory is corrupt, or still in the old pickle format."""
+
+
+class ModelBundle:
+    """A clustering model and the category mapping it was published with."""
+
+    def __init__(self, version, model_data, category_mapping, manifest=None):
+        self.version = version
+        self.model_data = model_data
+        self.category_mapping = category_mapping
+        self.manifest = manifest or {}
+        # Derived data (e.g. normalized centroids) computed once per bundle
+        self.cache = {}
+
+    def get_category_name(self, cluster_id):
+        return self.category_mapping.get(cluster_id, "Unknown")
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelArtifact(Mapping):
+    """Read-only model_data of one version: {"centroids", "labels", "embeddings"}.
+
+    Arrays outside EAGER_ARRAYS are memory-mapped on first access, so serving
+    never pages in the training embeddings.
+    """
+
+    def __init__(self, directory, manifest):
+        self.directory = directory
+        self.manifest = manifest
+        self._arrays = {}
+        self._lock = threading.Lock()
+        for name in EAGER_ARRAYS:
+            if name in self.manifest["arrays"]:
+                self._open(name, verify=True)
+
+    def _open(self, name, verify=False):
+        entry = self.manifest["arrays"][name]
+        path = os.path.join(self.directory, entry["file"])
+        if verify and _file_sha256(path) != entry["sha256"]:
+            raise ModelFormatError(f"Checksum mismatch for {path}")
+        array = np.load(path, mmap_mode=None if name in EAGER_ARRAYS else "r", allow_pickle=False)
+        if list(array.shape) != entry["shape"]:
+            raise ModelFormatError(f"{path} has shape {list(array.shape)}, manifest says {entry['shape']}")
+        self._arrays[name] = array
+        return array
+
+    def __getitem__(self, name):
+        if name not in self.manifest["arrays"]:
+            raise KeyError(name)
+        array = self._arrays.get(name)
+        if array is None:
+            with self._lock:
+                array = self._arrays.get(name)
+                if array is None:
+                    array = self._open(name)
+        return array
+
+    def __iter__(self):
+        return iter(self.manifest["arrays"])
+
+    def __len__(self):
+        return len(self.manifest["arrays"])
+
+    def verify(self):
+        """Check every array file against its manifest checksum."""
+        for entry in self.manifest["arrays"].values():
+            path = os.path.join(self.directory, entry["file"])
+            if _file_sha256(path) != entry["sha256"]:
+                raise ModelFormatError(f"Checksum mismatch for {path}")
+
+
+def _write_array(array, path):
+    with open(path, "wb") as f:
+        np.save(f, array, allow_pickle=False)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_artifact(directory, model_data, category_mapping, model_name=None):
+    """Write model_data's arrays and a manifest into directory. Returns the manifest."""
+    arrays = {}
+    for name, dtype in ARRAY_DTYPES.items():
+        if model_data.get(name) is None:
+            continue
+        array = np.ascontiguousarray(model_data[name], dtype=dtype)
+        path = os.path.join(directory, f"{name}.npy")
+        _write_array(array, path)
+        arrays[name] = {"file": f"{name}.npy", "dtype": array.dtype.str, "shape": list(array.shape),
+                        "sha256": _file_sha256(path)}
+    if "centroids" not in arrays:
+        raise ModelFormatError("model_data has no centroids")
+    n_clusters, dims = arrays["centroids"]["shape"]
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "model_name": model_name or model_data.get("model_name") or LEGACY_EMBEDDING_MODEL,
+        "dims": dims,
+        "n_clusters": n_clusters,
+        "rows": arrays["labels"]["shape"][0] if "labels" in arrays else None,
+        "arrays": arrays,
+        # Identifies the model content independently of its version name
+        "checksum": hashlib.sha256("".join(f"{name}:{entry['sha256']}\n" for name, entry
+                                           in sorted(arrays.items())).encode("utf-8")).hexdigest(),
+        # JSON keys are strings; read_artifact turns them back into cluster IDs
+        "category_mapping": {str(int(cluster)): category for cluster, category in category_mapping.items()},
+        "created_at": time.time(),
+    }
+    # The manifest is written last: a directory with a manifest has all of its arrays
+    tmp_path = os.path.join(directory, f"{MANIFEST_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(directory, MANIFEST_FILE))
+    return manifest
+
+
+def read_artifact(directory):
+    """(ModelArtifact, category mapping, manifest) for a version directory."""
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        if os.path.exists(os.path.join(directory, MODEL_FILE)):
+            raise ModelFormatError(f"{directory} holds a pickled model; run 'python backend/model_registry.py convert'")
+        raise
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ModelFormatError(f"Unsupported model artifact format {manifest.get('format')} in {directory}")
+    mapping = {int(cluster): category for cluster, category in manifest["category_mapping"].items()}
+    return ModelArtifact(directory, manifest), mapping, manifest
+
+
+def _read_pickles(model_path, mapping_path):
+    # Only called by the explicit convert command, never while serving
+    with open(model_path, "rb") as f:
+        model_data = pickle.load(f)
+    mapping = {}
+    if os.path.exists(mapping_path):
+        with open(mapping_path, "rb") as f:
+            mapping = pickle.load(f)
+    return model_data, mapping
+
+
+class ModelRegistry:
+    """Publishes, lists, loads and rolls back model versions on disk."""
+
+    def __init__(self, root=REGISTRY_DIR, keep_versions=KEEP_VERSIONS, seed_dir=SEED_DIR):
+        self.root = root
+        self.keep_versions = keep_versions
+        self.seed_dir = seed_dir
+        self._legacy_warned = False
+        os.makedirs(self.root, exist_ok=True)
+
+    @property
+    def current_path(self):
+        return os.path.join(self.root, "CURRENT")
+
+    @contextmanager
+    def _locked(self):
+        """Serialize publishers across threads and processes."""
+        with open(os.path.join(self.root, ".lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def list_versions(self):
+        return sorted(name for name in os.listdir(self.root)
+                      if name.startswith("v") and os.path.isdir(os.path.join(self.root, name)))
+
+    def _read_current(self):
+        try:
+            with open(self.current_path, "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def current_version(self):
+        current = self._read_current() or self._bootstrap_from_seed()
+        if current is None and not self._legacy_warned and os.path.exists(LEGACY_MODEL_PATH):
+            logging.warning(f"{LEGACY_MODEL_PATH} is not in the model registry; "
+                            f"run 'python backend/model_registry.py convert' to import it.")
+            self._legacy_warned = True
+        return current
+
+    def _bootstrap_from_seed(self):
+        """Publish the committed seed artifact as the first version of an empty registry."""
+        if not self.seed_dir or not os.path.exists(os.path.join(self.seed_dir, MANIFEST_FILE)):
+            return None
+        with self._locked():
+            current = self._read_current()
+            if current or self.list_versions():
+                return current
+            try:
+                model_data, mapping, manifest = read_artifact(self.seed_dir)
+                model_data.verify()
+                version = self._publish_locked(model_data, mapping, manifest["model_name"])
+            except (OSError, ValueError, KeyError) as e:
+                logging.error(f"Could not import seed model {self.seed_dir}: {e}")
+                return None
+        logging.info(f"Imported seed model {self.seed_dir} as version {version}")
+        return version
+
+    def _set_current(self, version):
+        tmp_path = f"{self.current_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.current_path)
+
+    def publish(self, model_data, category_mapping, model_name=None):
+        """Write a new version and make it current. Returns the version name."""
+        with self._locked():
+            return self._publish_locked(model_data, category_mapping, model_name)
+
+    def _publish_locked(self, model_data, category_mapping, model_name=None):
+        versions = self.list_versions()
+        number = int(versions[-1][1:]) + 1 if versions else 1
+        version = f"v{number:06d}"
+        tmp_dir = tempfile.mkdtemp(prefix=".publish-", dir=self.root)
+        try:
+            write_artifact(tmp_dir, model_data, category_mapping, model_name)
+            os.rename(tmp_dir, os.path.join(self.root, version))
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self._set_current(version)
+        self._prune(version)
+        logging.info(f"Published model version {version}")
+        return version
+
+    def convert(self, model_name=LEGACY_EMBEDDING_MODEL):
+        """Rewrite pickled versions as artifacts; import the legacy pickles if the registry is empty.
+
+        Returns the names of the versions written.
+        """
+        converted = []
+        with self._locked():
+            for version in self.list_versions():
+                directory = os.path.join(self.root, version)
+                if os.path.exists(os.path.join(directory, MANIFEST_FILE)) \
+                        or not os.path.exists(os.path.join(directory, MODEL_FILE)):
+                    continue
+                model_data, mapping = _read_pickles(os.path.join(directory, MODEL_FILE),
+                                                    os.path.join(directory, MAPPING_FILE))
+                write_artifact(directory, model_data, mapping, model_name)
+                for name in (MODEL_FILE, MAPPING_FILE):
+                    if os.path.exists(os.path.join(directory, name)):
+                        os.remove(os.path.join(directory, name))
+                converted.append(version)
+            if not self.list_versions() and os.path.exists(LEGACY_MODEL_PATH):
+                model_data, mapping = _read_pickles(LEGACY_MODEL_PATH, LEGACY_MAPPING_PATH)
+                converted.append(self._publish_locked(model_data, mapping, model_name))
+        return converted
+
+    def rollback(self, version=None):
+        """Point CURRENT at version, or at the one before the current version."""
+        with self._locked():
+            versions = self.list_versions()
+            current = self._read_current()
+            if version is None:
+                older = [v for v in versions if current is None or v < current]
+                if not older:
+                    raise ValueError("No earlier model version to roll back to.")
+                version = older[-1]
+            if version not in versions:
+                raise ValueError(f"Unknown model version: {version}")
+            self._set_current(version)
+        logging.info(f"Rolled back model to version {version}")
+        return version
+
+    def export_seed(self, version=None):
+        """Write a version (default: current) to seed_dir, replacing the previous seed."""
+        version = version or self.current_version()
+        if version is None:
+            raise ValueError("No model version to export.")
+        bundle = self.load(version)
+        parent = os.path.dirname(os.path.abspath(self.seed_dir))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".seed-", dir=parent)
+        try:
+            write_artifact(tmp_dir, bundle.model_data, bundle.category_mapping, bundle.manifest["model_name"])
+            shutil.rmtree(self.seed_dir, ignore_errors=True)
+            os.rename(tmp_dir, self.seed_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        logging.info(f"Exported model version {version} to {self.seed_dir}")
+        return version
+
+    def load(self, version):
+        model_data, mapping, manifest = read_artifact(os.path.join(self.root, version))
+        return ModelBundle(version, model_data, mapping, manifest)
+
+    def _prune(self, current):
+        versions = self.list_versions()
+        for version in versions[:-self.keep_versions] if self.keep_versions > 0 else []:
+            if version != current:
+                shutil.rmtree(os.path.join(self.root, version), ignore_errors=True)
+
+
+registry = ModelRegistry()
+
+_active_bundle = None
+_last_check = 0.0
+_active_lock = threading.Lock()
+
+
+def get_active_bundle(force_check=False):
+    """Return the current ModelBundle, reloading it when CURRENT has moved.
+
+    Returns None if no model has been trained yet.
+    """
+    global _active_bundle, _last_check
+    now = time.time()
+    bundle = _active_bundle
+    if bundle is not None and not force_check and now - _last_check < RELOAD_CHECK_SECONDS:
+        return bundle
+
+    with _active_lock:
+        _last_check = now
+        version = registry.current_version()
+        if version is None:
+            return None
+        if _active_bundle is None or _active_bundle.version != version:
+            started = time.perf_counter()
+            try:
+                loaded = registry.load(version)
+            except (OSError, ValueError, KeyError) as e:
+                logging.error(f"Could not load model version {version}: {e}")
+                return _active_bundle
+            record_timing("load:model_bundle", time.perf_counter() - started)
+            if _active_bundle is not None:
+                logging.info(f"Hot-swapped model {_active_bundle.version} -> {version}")
+            _active_bundle = loaded
+        return _active_bundle
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage NewsBlink model versions.")
+    parser.add_argument("command", choices=["list", "convert", "verify", "seed"])
+    parser.add_argument("version", nargs="?", help="version to verify or export as the seed (default: current)")
+    parser.add_argument("--model-name", default=LEGACY_EMBEDDING_MODEL,
+                        help="embedding model recorded for converted pickles")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "convert":
+        converted = registry.convert(args.model_name)
+        print(f"Converted {len(converted)} version(s): {', '.join(converted) or '-'}")
+    elif args.command == "seed":
+        print(f"Exported {registry.export_seed(args.version)} to {registry.seed_dir}")
+    elif args.command == "verify":
+        version = args.version or registry.current_version()
+        if version is None:
+            raise SystemExit("No model version to verify")
+        bundle = registry.load(version)
+        bundle.model_data.verify()
+        print(f"{version}: OK ({bundle.manifest['checksum']})")
+    else:
+        current = registry.current_version()
+        for version in registry.list_versions():
+            try:
+                manifest = registry.load(version).manifest
+                details = f"{manifest['model_name']} dims={manifest['dims']} clusters={manifest['n_clusters']} rows={manifest['rows']}"
+            except (OSError, ValueError, KeyError) as e:
+                details = f"unreadable: {e}"
+            print(f"{'*' if version == current else ' '} {version} {details}")
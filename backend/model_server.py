@@ -0,0 +1,237 @@
+"""Shared local inference server for NewsBlink backend.
+
+Running several uvicorn workers normally means one copy of BART and MiniLM per
+worker. Start one model server per host instead:
+
+    python -m backend.model_server --address /tmp/newsblink-models.sock
+
+and point the API workers at it with NEWSBLINK_MODEL_SERVER=/tmp/newsblink-models.sock.
+The workers then get small proxy objects from the summarizer/bert_model
+handles and send summarize/encode calls over the local socket, so the host
+holds a single copy of each model.
+
+multiprocessing.connection unpickles every message, so whoever can connect
+can run code in the server. Server and workers must share a secret in
+NEWSBLINK_MODEL_SERVER_AUTHKEY (neither starts without one), e.g.
+
+    export NEWSBLINK_MODEL_SERVER_AUTHKEY=$(python -c "import secrets; print(secrets.token_hex(32))")
+
+and TCP addresses must be on a loopback interface unless
+NEWSBLINK_MODEL_SERVER_ALLOW_REMOTE=1 is set.
+"""
+import argparse
+import ipaddress
+import logging
+import os
+import threading
+from multiprocessing.connection import Client, Listener
+
+MODEL_SERVER_ADDRESS = os.environ.get("NEWSBLINK_MODEL_SERVER", "")
+MODEL_SERVER_AUTHKEY = os.environ.get("NEWSBLINK_MODEL_SERVER_AUTHKEY", "").encode("utf-8")
+MODEL_SERVER_ALLOW_REMOTE = os.environ.get("NEWSBLINK_MODEL_SERVER_ALLOW_REMOTE", "0") == "1"
+
+
+def _family(address):
+    return "AF_UNIX" if isinstance(address, str) else "AF_INET"
+
+
+def parse_address(address, allow_remote=MODEL_SERVER_ALLOW_REMOTE):
+    """A filesystem path for a Unix socket, or host:port for TCP on a loopback address."""
+    if ":" in address and not address.startswith("/"):
+        host, port = address.rsplit(":", 1)
+        host = host.strip("[]")
+        if not allow_remote and not _is_loopback(host):
+            raise ValueError(f"Model server address {address} is not a loopback address; "
+                             f"set NEWSBLINK_MODEL_SERVER_ALLOW_REMOTE=1 to allow it")
+        return (host, int(port))
+    return address
+
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False  # other host names could resolve anywhere
+
+
+def _require_authkey(authkey):
+    if not authkey:
+        raise ValueError("NEWSBLINK_MODEL_SERVER_AUTHKEY must be set to a shared secret to use the model server")
+    return authkey
+
+
+class ModelServerError(RuntimeError):
+    """Raised in the client when the model server reports a failure."""
+
+
+class ModelServerClient:
+    """Sends calls to the model server, one persistent connection per thread."""
+
+    def __init__(self, address=MODEL_SERVER_ADDRESS, authkey=MODEL_SERVER_AUTHKEY):
+        self.address = parse_address(address)
+        self.authkey = _require_authkey(authkey)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, family=_family(self.address), authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def call(self, method, *args, **kwargs):
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send((method, args, kwargs))
+                status, value = conn.recv()
+                break
+            except (EOFError, OSError):
+                # Server restarted or the connection went stale; reconnect once
+                self._local.conn = None
+                if attempt == 1:
+                    raise
+        if status != "ok":
+            raise ModelServerError(value)
+        return value
+
+
+class RemoteSummarizer:
+    """Stands in for the transformers summarization pipeline.
+
+    The tokenizer is loaded locally (it is small) so chunk sizing does not
+    need a round trip; generation happens in the model server.
+    """
+
+    def __init__(self, client, model_name):
+        self.client = client
+        self.model_name = model_name
+        self._tokenizer = None
+        self._lock = threading.Lock()
+
+    @property
+    def tokenizer(self):
+        with self._lock:
+            if self._tokenizer is None:
+                from transformers import AutoTokenizer
+                self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        return self._tokenizer
+
+    def __call__(self, texts, **kwargs):
+        return self.client.call("summarize", texts, **kwargs)
+
+    def generate_from_ids(self, id_lists, **kwargs):
+        """Summaries for inputs that were already tokenized locally."""
+        return self.client.call("summarize_ids", id_lists, **kwargs)
+
+
+class RemoteEncoder:
+    """Stands in for SentenceTransformer.encode."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def encode(self, sentences, **kwargs):
+        return self.client.call("encode", sentences, **kwargs)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Client for NEWSBLINK_MODEL_SERVER, or None when models are loaded in-process."""
+    global _client
+    if not MODEL_SERVER_ADDRESS:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = ModelServerClient()
+        return _client
+
+
+class ModelServer:
+    """Owns the models and answers calls from API workers."""
+
+    def __init__(self, address, authkey=MODEL_SERVER_AUTHKEY, allow_remote=MODEL_SERVER_ALLOW_REMOTE):
+        self.address = parse_address(address, allow_remote)
+        self.authkey = _require_authkey(authkey)
+        self.handlers = {}
+        self._model_locks = {}
+        self._locks_by_model = {}
+
+    def register(self, method, handler, model=None):
+        """Serve method with handler; methods that share a model also share its lock."""
+        self.handlers[method] = handler
+        self._model_locks[method] = self._locks_by_model.setdefault(model or method, threading.Lock())
+
+    def serve_forever(self):
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+        with Listener(self.address, family=_family(self.address), authkey=self.authkey) as listener:
+            if isinstance(self.address, str):
+                os.chmod(self.address, 0o600)
+            logging.info(f"Model server listening on {self.address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logging.warning(f"Rejected model server connection: {e}")
+                    continue
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    def _serve_connection(self, conn):
+        with conn:
+            while True:
+                try:
+                    method, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                handler = self.handlers.get(method)
+                if handler is None:
+                    conn.send(("error", f"Unknown method: {method}"))
+                    continue
+                try:
+                    # One call per model at a time; the model itself uses all intra-op threads
+                    with self._model_locks[method]:
+                        result = handler(*args, **kwargs)
+                    conn.send(("ok", result))
+                except Exception as e:
+                    logging.error(f"Model server {method} failed: {e}")
+                    conn.send(("error", str(e)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve BART and MiniLM to NewsBlink API workers.")
+    parser.add_argument("--address", default=MODEL_SERVER_ADDRESS or "/tmp/newsblink-models.sock",
+                        help="Unix socket path, or host:port")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        # Checked before the models are loaded, so a misconfigured server fails fast
+        server = ModelServer(args.address)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    try:
+        from .modified_preprocessing import load_local_summarizer, generate_from_ids
+        from .clustering import load_local_bert_model
+    except ImportError:
+        from modified_preprocessing import load_local_summarizer, generate_from_ids
+        from clustering import load_local_bert_model
+
+    summarizer = load_local_summarizer()
+    bert_model = load_local_bert_model()
+
+    server.register("ping", lambda: "pong")
+    server.register("summarize", lambda texts, **kwargs: summarizer(texts, **kwargs), model="bart")
+    server.register("summarize_ids", lambda id_lists, **kwargs: generate_from_ids(summarizer, id_lists, **kwargs),
+                    model="bart")
+    server.register("encode", lambda sentences, **kwargs: bert_model.encode(sentences, **kwargs), model="minilm")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
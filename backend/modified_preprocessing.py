@@ -1,26 +1,94 @@
 """Preprocessing utilities for NewsBlink backend."""
 
-from youtube_transcript_api import YouTubeTranscriptApi
-from transformers import pipeline
+import multiprocessing
+import os
 import re
-import nltk
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 from nltk.stem import WordNetLemmatizer
+try:
+    from .model_handles import LazyModel, nltk_data, configure_torch, quantize_linear_layers, QUANTIZE
+    from .model_server import get_client, RemoteSummarizer
+    from .transcript_fetcher import get_transcript_fetcher, TranscriptUnavailable
+    from .metrics import STAGE_SECONDS, time_stage
+except ImportError:
+    from model_handles import LazyModel, nltk_data, configure_torch, quantize_linear_layers, QUANTIZE
+    from model_server import get_client, RemoteSummarizer
+    from transcript_fetcher import get_transcript_fetcher, TranscriptUnavailable
+    from metrics import STAGE_SECONDS, time_stage
 
-# Download necessary NLTK data (safe to call multiple times)
-nltk.download('stopwords', quiet=True)
-nltk.download('punkt', quiet=True)
-nltk.download('wordnet', quiet=True)
-nltk.download('punkt_tab', quiet=True)
+SUMMARIZER_MODEL_NAME = "facebook/bart-large-cnn"
 
-# Summarization Pipeline
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+# Number of chunks sent through BART per generate call
+SUMMARY_BATCH_SIZE = int(os.environ.get("NEWSBLINK_SUMMARY_BATCH_SIZE", "4"))
 
-# Load stopwords and lemmatizer
-stop_words = set(stopwords.words('english'))
+# "tokens" packs sentences by exact BART token count; "words" is the original word-count chunker
+CHUNKER = os.environ.get("NEWSBLINK_CHUNKER", "tokens")
+# ~600 words, the word chunker's budget; capped at what BART accepts without truncation
+MAX_CHUNK_TOKENS = int(os.environ.get("NEWSBLINK_CHUNK_TOKENS", "800"))
+CHUNK_OVERLAP_TOKENS = int(os.environ.get("NEWSBLINK_CHUNK_OVERLAP_TOKENS", "0"))
+
+# Default per-request BART input budget for the extractive prefilter (0: summarize everything)
+SUMMARY_TOKEN_BUDGET = int(os.environ.get("NEWSBLINK_SUMMARY_TOKEN_BUDGET", "0"))
+MIN_TOKEN_BUDGET = 64
+# "centroid" (O(n)) or "textrank" (power iteration over the sentence similarity graph)
+SALIENCE_METHOD = os.environ.get("NEWSBLINK_SALIENCE_METHOD", "centroid")
+# Unpunctuated captions are ranked in windows of this many words instead of sentences
+SALIENCE_UNIT_WORDS = 40
+
+# preprocess_batch: worker processes, rows per work unit, and the row count worth a pool
+PREPROCESS_WORKERS = int(os.environ.get("NEWSBLINK_PREPROCESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+PREPROCESS_CHUNK_SIZE = int(os.environ.get("NEWSBLINK_PREPROCESS_CHUNK_SIZE", "256"))
+PREPROCESS_MIN_PARALLEL_ROWS = 2000
+LEMMA_CACHE_SIZE = int(os.environ.get("NEWSBLINK_LEMMA_CACHE_SIZE", "100000"))
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_URL = re.compile(r'http\S+|www\S+|https\S+', flags=re.MULTILINE)
+_HTML_TAG = re.compile(r'<.*?>')
+_NON_LETTER = re.compile(r'[^a-zA-Z\s]')
+
+# A chunk of the transcript and its BART input IDs (special tokens included)
+TokenChunk = namedtuple("TokenChunk", ["text", "input_ids"])
+
+
+def load_local_summarizer(quantize=QUANTIZE):
+    # transformers is slow to import, so it is only imported when the model is needed
+    from transformers import pipeline
+    configure_torch()
+    summarizer = pipeline("summarization", model=SUMMARIZER_MODEL_NAME, device=-1 if quantize else None)
+    if quantize:
+        summarizer.model = quantize_linear_layers(summarizer.model)
+    return summarizer
+
+
+def _load_summarizer():
+    # With NEWSBLINK_MODEL_SERVER set, generation runs in the shared model server
+    client = get_client()
+    if client is not None:
+        return RemoteSummarizer(client, SUMMARIZER_MODEL_NAME)
+    return load_local_summarizer()
+
+
+def _load_stop_words():
+    nltk_data.get()
+    return set(stopwords.words('english'))
+
+
+# Summarization pipeline and stopwords, loaded on first use (see model_handles)
+summarizer_handle = LazyModel("summarizer", _load_summarizer)
+stop_words_handle = LazyModel("stopwords", _load_stop_words)
 lemmatizer = WordNetLemmatizer()
 
+
+def get_summarizer():
+    return summarizer_handle.get()
+
 def extract_video_id(youtube_url):
     """Extracts the video ID from a full YouTube URL."""
     # Handle various YouTube URL formats
@@ -47,56 +115,23 @@ def extract_youtube_transcript(video_url):
         return "Invalid YouTube URL - could not extract video ID"
     
     try:
-        # Try the basic method first
-        print("=== DEBUG: Trying basic transcript method ===")
-        transcript = YouTubeTranscriptApi.get_transcript(video_id)
-        
-        if not transcript:
-            return "No transcript available for this video"
-        
-        full_text = " ".join([entry['text'] for entry in transcript])
-        if not full_text.strip():
-            return "Transcript is empty"
-        
-        print(f"=== DEBUG: Successfully extracted transcript of length: {len(full_text)} ===")
-        return full_text
-        
+        # Served from the transcript store when this video was fetched before
+        full_text = get_transcript_fetcher().fetch(video_id)
+    except TranscriptUnavailable as e:
+        print(f"=== DEBUG: No usable transcript: {e} ===")
+        return str(e)
     except Exception as e:
         error_msg = str(e)
-        print(f"=== DEBUG: Basic transcript extraction error: {error_msg} ===")
-        
-        # Try alternative method with transcript list
-        try:
-            print("=== DEBUG: Trying transcript list method ===")
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-            
-            # Get the first available transcript
-            for transcript_obj in transcript_list:
-                try:
-                    transcript = transcript_obj.fetch()
-                    if transcript:
-                        full_text = " ".join([entry['text'] for entry in transcript])
-                        print(f"=== DEBUG: Successfully extracted transcript via list method, length: {len(full_text)} ===")
-                        return full_text
-                except Exception as inner_e:
-                    print(f"=== DEBUG: Failed to fetch transcript: {inner_e} ===")
-                    continue
-            
-            return "No transcript available for this video"
-            
-        except Exception as list_error:
-            print(f"=== DEBUG: Transcript list method also failed: {list_error} ===")
-        
-        if "No transcript available" in error_msg:
-            return "No transcript available for this video"
-        elif "Video unavailable" in error_msg:
-            return "Video is unavailable or private"
-        elif "TranscriptsDisabled" in error_msg:
-            return "Transcripts are disabled for this video"
-        elif "no element found" in error_msg.lower():
+        print(f"=== DEBUG: Transcript extraction error: {error_msg} ===")
+        if "no element found" in error_msg.lower():
             return "Transcript extraction failed - video may not have captions or may be restricted"
-        else:
-            return f"Transcript extraction failed: {error_msg}"
+        return f"Transcript extraction failed: {error_msg}"
+
+    if not full_text.strip():
+        return "Transcript is empty"
+
+    print(f"=== DEBUG: Successfully extracted transcript of length: {len(full_text)} ===")
+    return full_text
 
 def chunk_text(text: str, max_length: int = 600):
     """Split text into chunks while preserving sentence boundaries."""
@@ -125,6 +160,242 @@ def chunk_text(text: str, max_length: int = 600):
         return [text]
 
 
+def _pack_spans(spans, max_tokens, overlap):
+    """Group consecutive (start, end) token spans into chunks of at most max_tokens."""
+    chunks = []
+    current = []
+    size = 0
+    for start, end in spans:
+        length = end - start
+        if current and size + length > max_tokens:
+            chunks.append((current[0][0], current[-1][1]))
+            # Carry trailing sentences into the next chunk, up to overlap tokens
+            carried = []
+            carried_size = 0
+            for span in reversed(current):
+                if carried_size + span[1] - span[0] > overlap:
+                    break
+                carried.insert(0, span)
+                carried_size += span[1] - span[0]
+            if carried_size + length > max_tokens:
+                carried, carried_size = [], 0
+            current, size = carried, carried_size
+        current.append((start, end))
+        size += length
+    if current:
+        chunks.append((current[0][0], current[-1][1]))
+    return chunks
+
+
+def chunk_tokens(text, tokenizer=None, max_tokens=MAX_CHUNK_TOKENS, overlap=CHUNK_OVERLAP_TOKENS):
+    """Split text into TokenChunks with one tokenizer pass.
+
+    Sentences are packed by exact token count; a sentence longer than
+    max_tokens is split into max_tokens windows, so no text is lost to
+    BART's input truncation. Consecutive chunks share up to overlap tokens
+    of whole sentences. Returns None if no fast (offset-mapping) tokenizer is
+    available.
+    """
+    if tokenizer is None:
+        tokenizer = getattr(get_summarizer(), "tokenizer", None)
+    if tokenizer is None or not getattr(tokenizer, "is_fast", False):
+        return None
+    max_tokens = min(max_tokens, tokenizer.model_max_length - tokenizer.num_special_tokens_to_add())
+    overlap = max(0, min(overlap, max_tokens // 2))
+
+    encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+    ids = encoding["input_ids"]
+    offsets = encoding["offset_mapping"]
+    if not ids:
+        return []
+
+    # Token spans of each sentence, from the character offsets of sentence starts
+    sentence_starts = [0] + [match.end() for match in _SENTENCE_BOUNDARY.finditer(text)]
+    spans = []
+    span_start = 0
+    current_sentence = 0
+    for index, (char_start, _) in enumerate(offsets):
+        sentence = bisect_right(sentence_starts, char_start) - 1
+        if sentence != current_sentence and index > span_start:
+            spans.append((span_start, index))
+            span_start = index
+        current_sentence = sentence
+    spans.append((span_start, len(ids)))
+
+    pieces = []
+    for start, end in spans:
+        for piece_start in range(start, end, max_tokens):
+            pieces.append((piece_start, min(end, piece_start + max_tokens)))
+
+    chunks = []
+    for start, end in _pack_spans(pieces, max_tokens, overlap):
+        chunks.append(TokenChunk(
+            text=text[offsets[start][0]:offsets[end - 1][1]],
+            input_ids=tokenizer.build_inputs_with_special_tokens(ids[start:end]),
+        ))
+    return chunks
+
+
+def split_into_chunks(text):
+    """Chunks of text worth summarizing (more than 30 words).
+
+    TokenChunks from the token-exact chunker when a fast tokenizer is
+    available, otherwise plain strings from chunk_text.
+    """
+    with time_stage("chunking"):
+        chunks = None
+        if CHUNKER == "tokens":
+            try:
+                chunks = chunk_tokens(text)
+            except Exception as e:
+                print(f"=== DEBUG: Token chunking failed, using word chunks: {str(e)} ===")
+        if chunks is None:
+            chunks = chunk_text(text)
+        return [chunk for chunk in chunks if len(_chunk_text(chunk).split()) > 30]
+
+
+def _chunk_text(chunk):
+    return chunk.text if isinstance(chunk, TokenChunk) else chunk
+
+
+def generate_from_ids(summarizer, id_lists, **generate_kwargs):
+    """Run BART generate on already tokenized inputs and decode the summaries."""
+    import torch
+
+    tokenizer = summarizer.tokenizer
+    model = summarizer.model
+    width = max(len(ids) for ids in id_lists)
+    input_ids = torch.full((len(id_lists), width), tokenizer.pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(id_lists), width), dtype=torch.long)
+    for row, ids in enumerate(id_lists):
+        input_ids[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+        attention_mask[row, :len(ids)] = 1
+    with torch.no_grad():
+        output_ids = model.generate(input_ids=input_ids.to(model.device),
+                                    attention_mask=attention_mask.to(model.device), **generate_kwargs)
+    # Same decoding as the summarization pipeline, so both paths return identical text
+    return tokenizer.batch_decode(output_ids, skip_special_tokens=True, clean_up_tokenization_spaces=False)
+
+
+def _summarize_batch(summarizer, chunks, **generate_kwargs):
+    """Summary text for each chunk in one generate call."""
+    started = time.perf_counter()
+    texts = _generate_batch(summarizer, chunks, **generate_kwargs)
+    # One observation per chunk, so the histogram counts chunks whatever the batch size
+    per_chunk = (time.perf_counter() - started) / max(1, len(chunks))
+    for _ in chunks:
+        STAGE_SECONDS.observe(per_chunk, stage="bart_generate")
+    return texts
+
+
+def _generate_batch(summarizer, chunks, **generate_kwargs):
+    if all(isinstance(chunk, TokenChunk) for chunk in chunks):
+        id_lists = [chunk.input_ids for chunk in chunks]
+        # The model server runs generate itself; only the IDs cross the socket
+        remote = getattr(summarizer, "generate_from_ids", None)
+        if remote is not None:
+            return remote(id_lists, **generate_kwargs)
+        return generate_from_ids(summarizer, id_lists, **generate_kwargs)
+
+    outputs = summarizer([_chunk_text(chunk) for chunk in chunks], truncation=True, batch_size=len(chunks), **generate_kwargs)
+    texts = []
+    for output in outputs:
+        if isinstance(output, list):
+            output = output[0]
+        texts.append(output['summary_text'])
+    return texts
+
+
+def salience_units(text, max_words=SALIENCE_UNIT_WORDS):
+    """Sentences of text; sentences much longer than max_words are split into windows."""
+    units = []
+    for sentence in _SENTENCE_BOUNDARY.split(text):
+        words = sentence.split()
+        if len(words) <= max_words * 3 // 2:
+            if words:
+                units.append(sentence.strip())
+            continue
+        for start in range(0, len(words), max_words):
+            units.append(" ".join(words[start:start + max_words]))
+    return units
+
+
+def salience_scores(embeddings, method=SALIENCE_METHOD):
+    """Salience of each unit from its normalized MiniLM embedding."""
+    import numpy as np
+
+    if method == "textrank":
+        similarity = np.clip(embeddings @ embeddings.T, 0, None)
+        np.fill_diagonal(similarity, 0)
+        row_sums = similarity.sum(axis=1, keepdims=True)
+        row_sums[row_sums == 0] = 1
+        transition = similarity / row_sums
+        scores = np.full(len(embeddings), 1.0 / len(embeddings))
+        for _ in range(30):
+            updated = 0.15 / len(embeddings) + 0.85 * transition.T @ scores
+            if np.abs(updated - scores).sum() < 1e-6:
+                break
+            scores = updated
+        return scores
+    # Closeness to the document's mean embedding
+    centroid = embeddings.mean(axis=0)
+    norm = np.linalg.norm(centroid)
+    return embeddings @ (centroid / norm) if norm else np.zeros(len(embeddings))
+
+
+def select_salient_text(text, token_budget, method=SALIENCE_METHOD):
+    """Keep the most salient sentences of text that fit in token_budget BART tokens.
+
+    Sentences are ranked with MiniLM embeddings and picked greedily by
+    salience, then joined in their original order. Text already within the
+    budget is returned unchanged without encoding anything.
+    """
+    import numpy as np
+
+    units = salience_units(text)
+    if not units:
+        return text
+    tokenizer = getattr(get_summarizer(), "tokenizer", None)
+    try:
+        lengths = [len(ids) for ids in tokenizer(units, add_special_tokens=False, verbose=False)["input_ids"]]
+    except Exception:
+        # Roughly 4 BART tokens per 3 English words
+        lengths = [len(unit.split()) * 4 // 3 + 1 for unit in units]
+    if sum(lengths) <= token_budget:
+        return text
+
+    # clustering pulls in sklearn, so it is only imported when the prefilter runs
+    try:
+        from .clustering import get_bert_model, normalize_rows
+    except ImportError:
+        from clustering import get_bert_model, normalize_rows
+    embeddings = normalize_rows(get_bert_model().encode(units, convert_to_numpy=True))
+    scores = salience_scores(embeddings, method)
+
+    selected = []
+    used = 0
+    for index in np.argsort(-scores):
+        if used + lengths[index] <= token_budget:
+            selected.append(index)
+            used += lengths[index]
+    if not selected:
+        # Even the best unit is over budget; keep it and let the chunker split it
+        selected = [int(np.argmax(scores))]
+    print(f"=== DEBUG: Salience prefilter kept {len(selected)}/{len(units)} sentences ({used} tokens, budget {token_budget}) ===")
+    return " ".join(units[i] for i in sorted(selected))
+
+
+def apply_token_budget(text, token_budget):
+    """text reduced by select_salient_text when a budget is set, else text unchanged."""
+    if not token_budget or token_budget <= 0:
+        return text
+    try:
+        return select_salient_text(text, max(MIN_TOKEN_BUDGET, token_budget))
+    except Exception as e:
+        print(f"=== DEBUG: Salience prefilter failed, summarizing full text: {str(e)} ===")
+        return text
+
+
 def postprocess_summary(summary: str) -> str:
     """Clean up the generated summary."""
     summary = re.sub(r'\s+', ' ', summary)
@@ -133,51 +404,116 @@ def postprocess_summary(summary: str) -> str:
     return summary.strip()
 
 
-def summarize_text(text, max_length=150, min_length=30):
-    """Summarizes extracted text using multi-chunk approach."""
+def _generation_lengths(token_count, min_length=30):
+    """Pick generation limits adapted to an input length in tokens."""
+    adaptive_max_new = min(120, max(60, token_count // 2))
+    adaptive_min = max(10, min(min_length, max(10, token_count // 3)))
+    # Ensure min does not exceed max_new_tokens - 5
+    adaptive_min = min(adaptive_min, max(10, adaptive_max_new - 5))
+    return adaptive_max_new, adaptive_min
+
+
+def count_tokens(chunks):
+    """Token counts for all chunks from a single batched tokenizer pass."""
+    if chunks and all(isinstance(chunk, TokenChunk) for chunk in chunks):
+        # Already tokenized by chunk_tokens
+        return [len(chunk.input_ids) for chunk in chunks]
+    chunks = [_chunk_text(chunk) for chunk in chunks]
+    tokenizer = getattr(get_summarizer(), "tokenizer", None)
+    if tokenizer is not None:
+        try:
+            ids = tokenizer(list(chunks), truncation=True).get("input_ids", [])
+            if len(ids) == len(chunks):
+                return [len(chunk_ids) for chunk_ids in ids]
+        except Exception as e:
+            print(f"=== DEBUG: Error tokenizing chunks: {str(e)} ===")
+    # Choose conservative defaults if token counts are unavailable
+    return [max(64, len(chunk.split())) for chunk in chunks]
+
+
+def summarize_chunks(chunks, min_length=30, batch_size=SUMMARY_BATCH_SIZE, token_counts=None):
+    """Summarize chunks in length-sorted batches.
+
+    Returns one postprocessed summary per chunk in the original order, with
+    None for chunks that could not be summarized.
+    """
+    summarizer = get_summarizer()
+    if token_counts is None:
+        token_counts = count_tokens(chunks)
+    batch_size = max(1, batch_size)
+    # Sorting by length keeps padding (and wasted compute) within a batch small
+    order = sorted(range(len(chunks)), key=lambda i: token_counts[i])
+    results = [None] * len(chunks)
+
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        # The longest chunk sets the output budget, the shortest bounds min_length
+        max_new, _ = _generation_lengths(max(token_counts[i] for i in batch), min_length)
+        _, min_len = _generation_lengths(min(token_counts[i] for i in batch), min_length)
+        min_len = min(min_len, max(10, max_new - 5))
+        print(f"=== DEBUG: Summarizing batch of {len(batch)} chunk(s) ({start + len(batch)}/{len(order)}) ===")
+        try:
+            outputs = _summarize_batch(
+                summarizer,
+                [chunks[i] for i in batch],
+                max_new_tokens=max_new,
+                min_length=min_len,
+                do_sample=False
+            )
+            for i, output in zip(batch, outputs):
+                results[i] = postprocess_summary(output)
+        except Exception as e:
+            print(f"=== DEBUG: Error summarizing batch: {str(e)} ===")
+            if len(batch) > 1:
+                # Retry one chunk at a time so a single bad chunk doesn't sink the batch
+                retried = summarize_chunks([chunks[i] for i in batch], min_length, 1,
+                                           [token_counts[i] for i in batch])
+                for i, chunk_summary in zip(batch, retried):
+                    results[i] = chunk_summary
+    return results
+
+
+def iter_chunk_summaries(text, min_length=30, batch_size=SUMMARY_BATCH_SIZE, token_budget=SUMMARY_TOKEN_BUDGET):
+    """Yield (index, total, summary) for each chunk as soon as BART produces it.
+
+    Chunks are summarized in their original order. The first one goes through
+    on its own so the first summary arrives as early as possible; the rest are
+    batched. summary is None for chunks that could not be summarized.
+    """
+    chunks = split_into_chunks(apply_token_budget(text, token_budget))
+    if not chunks:
+        return
+    token_counts = count_tokens(chunks)
+    start = 0
+    while start < len(chunks):
+        size = 1 if start == 0 else max(1, batch_size)
+        batch_summaries = summarize_chunks(chunks[start:start + size], min_length, size,
+                                           token_counts[start:start + size])
+        for offset, chunk_summary in enumerate(batch_summaries):
+            yield start + offset, len(chunks), chunk_summary
+        start += size
+
+
+def fallback_summary(text):
+    """Truncated transcript used when no chunk could be summarized."""
+    fallback_length = min(200, len(text))
+    return text[:fallback_length] + "..." if len(text) > fallback_length else text
+
+
+def summarize_text(text, max_length=150, min_length=30, batch_size=SUMMARY_BATCH_SIZE,
+                   token_budget=SUMMARY_TOKEN_BUDGET):
+    """Summarizes extracted text using multi-chunk approach.
+
+    With a token_budget, only the most salient sentences that fit in that
+    many BART tokens are summarized, which bounds the cost for long videos.
+    """
     try:
-        if not summarizer:
+        if not get_summarizer():
             raise RuntimeError("Summarizer model not loaded")
 
-        # Split text into manageable chunks
-        chunks = chunk_text(text)
-        summaries = []
-        tokenizer = getattr(summarizer, "tokenizer", None)
-
-        for i, chunk in enumerate(chunks):
-            if len(chunk.split()) > 30:
-                print(f"=== DEBUG: Summarizing chunk {i+1}/{len(chunks)} ===")
-                try:
-                    # Adapt generation lengths to the chunk token length
-                    token_count = None
-                    if tokenizer is not None:
-                        tokenized = tokenizer(chunk, truncation=True)
-                        ids = tokenized.get("input_ids", [])
-                        if ids:
-                            # Handle both list[int] and list[list[int]]
-                            token_count = len(ids[0]) if isinstance(ids[0], list) else len(ids)
-
-                    # Choose conservative defaults if token_count unavailable
-                    if token_count is None:
-                        token_count = max(64, len(chunk.split()))
-
-                    adaptive_max_new = min(120, max(60, token_count // 2))
-                    adaptive_min = max(10, min(min_length, max(10, token_count // 3)))
-                    # Ensure min does not exceed max_new_tokens - 5
-                    adaptive_min = min(adaptive_min, max(10, adaptive_max_new - 5))
-
-                    summary = summarizer(
-                        chunk,
-                        max_new_tokens=adaptive_max_new,
-                        min_length=adaptive_min,
-                        do_sample=False,
-                        truncation=True
-                    )
-                    chunk_summary = postprocess_summary(summary[0]['summary_text'])
-                    summaries.append(chunk_summary)
-                except Exception as e:
-                    print(f"=== DEBUG: Error summarizing chunk {i+1}: {str(e)} ===")
-                    continue
+        # Split text into manageable chunks, skipping ones too short to summarize
+        chunks = split_into_chunks(apply_token_budget(text, token_budget))
+        summaries = [s for s in summarize_chunks(chunks, min_length, batch_size) if s]
 
         if not summaries:
             raise Exception("Failed to generate summary from any chunks")
@@ -190,35 +526,98 @@ def summarize_text(text, max_length=150, min_length=30):
 
     except Exception as e:
         print(f"=== DEBUG: Summarization error: {str(e)} ===")
-        fallback_length = min(200, len(text))
-        return text[:fallback_length] + "..." if len(text) > fallback_length else text
+        return fallback_summary(text)
+
+def summarize_texts(texts, min_length=30, batch_size=SUMMARY_BATCH_SIZE, token_budget=SUMMARY_TOKEN_BUDGET):
+    """Summarize several transcripts with their chunks batched together.
+
+    Chunks from all texts share length-sorted batches, so a bulk request keeps
+    BART busy with full batches. Returns one summary per text, falling back to
+    the truncated text when none of its chunks could be summarized.
+    """
+    owners = []
+    chunks = []
+    for index, text in enumerate(texts):
+        for chunk in split_into_chunks(apply_token_budget(text, token_budget)):
+            owners.append(index)
+            chunks.append(chunk)
+
+    per_text = [[] for _ in texts]
+    if chunks:
+        try:
+            for index, chunk_summary in zip(owners, summarize_chunks(chunks, min_length, batch_size)):
+                if chunk_summary:
+                    per_text[index].append(chunk_summary)
+        except Exception as e:
+            print(f"=== DEBUG: Batch summarization error: {str(e)} ===")
+
+    print(f"=== DEBUG: Summarized {len(texts)} text(s) from {len(chunks)} chunk(s) ===")
+    return [postprocess_summary(" ".join(parts)) if parts else fallback_summary(text)
+            for text, parts in zip(texts, per_text)]
 
 def clean_text(text):
     """Preprocess text by removing special characters and converting to lowercase."""
-    text = re.sub(r'[^\w\s]', '', text)
+    text = _PUNCTUATION.sub('', text)
     return text.lower().strip()
 
 def normalize_text(text):
     """Lowercase, remove URLs, HTML tags, special characters, and extra spaces."""
     text = text.lower()
-    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-    text = re.sub(r'<.*?>', '', text)
-    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    text = _URL.sub('', text)
+    text = _HTML_TAG.sub('', text)
+    text = _NON_LETTER.sub('', text)
     text = text.strip()
     return text
 
 def remove_stopwords(tokens):
     """Remove English stopwords from token list."""
+    stop_words = stop_words_handle.get()
     return [word for word in tokens if word not in stop_words]
 
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize_word(word):
+    """WordNet lemma of a token; news vocabulary repeats a lot, so lemmas are memoized."""
+    return lemmatizer.lemmatize(word)
+
 def lemmatize_tokens(tokens):
     """Lemmatize a list of tokens."""
-    return [lemmatizer.lemmatize(word) for word in tokens]
+    return [lemmatize_word(word) for word in tokens]
 
 def preprocess_for_clustering(text):
     """Full pipeline: normalize, tokenize, remove stopwords, lemmatize, join back to string."""
+    nltk_data.get()
     norm = normalize_text(text)
     tokens = word_tokenize(norm)
     filtered = remove_stopwords(tokens)
     lemmatized = lemmatize_tokens(filtered)
-    return " ".join(lemmatized)
\ No newline at end of file
+    return " ".join(lemmatized)
+
+def _init_preprocess_worker():
+    nltk_data.get()
+    stop_words_handle.get()
+
+def _preprocess_chunk(texts):
+    return [preprocess_for_clustering(text) for text in texts]
+
+def preprocess_batch(texts, workers=PREPROCESS_WORKERS, chunk_size=PREPROCESS_CHUNK_SIZE):
+    """preprocess_for_clustering for many texts, in order, with identical output.
+
+    Large inputs are split into chunk_size work units and spread over a pool
+    of worker processes; small ones run in this process, where starting a
+    pool would cost more than it saves.
+    """
+    texts = list(texts)
+    chunk_size = max(1, chunk_size)
+    if workers <= 1 or len(texts) < max(PREPROCESS_MIN_PARALLEL_ROWS, 2 * chunk_size):
+        nltk_data.get()
+        return _preprocess_chunk(texts)
+
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+    # spawn, not fork: this runs inside the threaded API process during retrains
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_preprocess_worker) as executor:
+        results = []
+        for processed in executor.map(_preprocess_chunk, chunks):
+            results.extend(processed)
+    print(f"=== DEBUG: Preprocessed {len(texts)} texts in {len(chunks)} chunks on {workers} processes ===")
+    return results
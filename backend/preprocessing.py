@@ -1,7 +1,6 @@
 """Preprocessing utilities for NewsBlink backend."""
 
 from youtube_transcript_api import YouTubeTranscriptApi
-from transformers import pipeline
 import re
 import nltk
 from nltk.corpus import stopwords
@@ -14,8 +13,11 @@ nltk.download('punkt', quiet=True)
 nltk.download('wordnet', quiet=True)
 nltk.download('punkt_tab', quiet=True)
 
-# Summarization Pipeline
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+# Summarization pipeline shared with modified_preprocessing (and the model server, if configured)
+try:
+    from .modified_preprocessing import get_summarizer
+except ImportError:
+    from modified_preprocessing import get_summarizer
 
 # Load stopwords and lemmatizer
 stop_words = set(stopwords.words('english'))
@@ -100,7 +102,7 @@ def extract_youtube_transcript(video_url):
 
 def summarize_text(text, max_length=130):
     """Summarizes extracted text."""
-    summary = summarizer(text, max_length=max_length, min_length=50, do_sample=False)
+    summary = get_summarizer()(text, max_length=max_length, min_length=50, do_sample=False)
     return summary[0]['summary_text']
 
 def clean_text(text):
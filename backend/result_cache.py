@@ -0,0 +1,163 @@
+"""Result cache for processed videos in NewsBlink backend."""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+try:
+    from .model_handles import QUANTIZE
+    from .metrics import record_cache
+except ImportError:
+    from model_handles import QUANTIZE
+    from metrics import record_cache
+
+CACHE_DIR = os.environ.get("NEWSBLINK_RESULT_CACHE_DIR", "backend/cache/results")
+CACHE_MEMORY_ITEMS = int(os.environ.get("NEWSBLINK_RESULT_CACHE_ITEMS", "256"))
+CACHE_MAX_BYTES = int(os.environ.get("NEWSBLINK_RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_TTL_SECONDS = int(os.environ.get("NEWSBLINK_RESULT_CACHE_TTL", str(7 * 24 * 3600)))
+
+SUMMARIZER_MODEL_NAME = "facebook/bart-large-cnn"
+
+
+def get_model_version(registry_version):
+    """Identify the models a cached result was produced with."""
+    # int8 models produce slightly different summaries, so their results are cached separately
+    variant = "-int8" if QUANTIZE else ""
+    return f"{registry_version or 'untrained'}-{hashlib.sha1(SUMMARIZER_MODEL_NAME.encode('utf-8')).hexdigest()[:8]}{variant}"
+
+
+class ResultCache:
+    """Two-tier (in-memory LRU + on-disk JSON) cache of /process_video results.
+
+    Entries are keyed by video ID and model version, so a retrain or a new
+    summarizer naturally invalidates older results. The disk tier is evicted
+    by age (TTL) and by total size, oldest entries first.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_items=CACHE_MEMORY_ITEMS,
+                 max_bytes=CACHE_MAX_BYTES, ttl_seconds=CACHE_TTL_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(video_id, model_version):
+        return f"{video_id}-{model_version}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _expired(self, stored_at):
+        return self.ttl_seconds > 0 and time.time() - stored_at > self.ttl_seconds
+
+    def get(self, video_id, model_version):
+        """Return the cached result for a video, or None on a miss."""
+        key = self.make_key(video_id, model_version)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry["stored_at"]):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    record_cache("result", True)
+                    return dict(entry["result"])
+                del self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            record_cache("result", False)
+            return None
+
+        if self._expired(entry.get("stored_at", 0)):
+            self._remove_file(path)
+            with self._lock:
+                self.misses += 1
+            record_cache("result", False)
+            return None
+
+        with self._lock:
+            self._remember(key, entry)
+            self.hits += 1
+        record_cache("result", True)
+        return dict(entry["result"])
+
+    def put(self, video_id, model_version, result):
+        """Store a result in both tiers."""
+        key = self.make_key(video_id, model_version)
+        entry = {"stored_at": time.time(), "result": result}
+        with self._lock:
+            self._remember(key, entry)
+
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not write result cache entry {key}: {e}")
+            self._remove_file(tmp_path)
+            return
+        self.evict()
+
+    def invalidate(self, video_id, model_version):
+        key = self.make_key(video_id, model_version)
+        with self._lock:
+            self._memory.pop(key, None)
+        self._remove_file(self._path(key))
+
+    def evict(self):
+        """Drop expired disk entries, then the oldest ones until under max_bytes."""
+        try:
+            names = [n for n in os.listdir(self.cache_dir) if n.endswith(".json")]
+        except OSError:
+            return
+        entries = []
+        total = 0
+        now = time.time()
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if self.ttl_seconds > 0 and now - stat.st_mtime > self.ttl_seconds:
+                self._remove_file(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove_file(path)
+            total -= size
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
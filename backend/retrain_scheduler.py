@@ -0,0 +1,129 @@
+"""Coalescing retrain scheduler for NewsBlink backend."""
+import logging
+import os
+import threading
+import time
+try:
+    from .metrics import STAGE_SECONDS, record_failure
+except ImportError:
+    from metrics import STAGE_SECONDS, record_failure
+
+RETRAIN_WINDOW_SECONDS = float(os.environ.get("NEWSBLINK_RETRAIN_WINDOW", "300"))
+RETRAIN_MIN_NEW_ROWS = int(os.environ.get("NEWSBLINK_RETRAIN_MIN_ROWS", "20"))
+
+
+class RetrainScheduler:
+    """Batches dataset appends and runs at most one retrain at a time.
+
+    A retrain starts once RETRAIN_MIN_NEW_ROWS rows have been appended, or
+    RETRAIN_WINDOW_SECONDS after the first pending row, whichever comes first.
+    Requests that arrive while rows are already pending are folded into the
+    next run instead of queueing a retrain each.
+    """
+
+    def __init__(self, retrain_fn, window_seconds=RETRAIN_WINDOW_SECONDS, min_new_rows=RETRAIN_MIN_NEW_ROWS):
+        self.retrain_fn = retrain_fn
+        self.window_seconds = window_seconds
+        self.min_new_rows = max(1, min_new_rows)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pending_rows = 0
+        self._pending_requests = 0
+        self._first_pending_at = None
+        self._flush_requested = False
+        self._running = False
+        self.requests = 0
+        self.runs = 0
+        self.superseded = 0
+        self.failures = 0
+        self.last_run = None
+
+    def notify(self, new_rows=1):
+        """Record newly appended rows; the retrain itself happens later."""
+        with self._cond:
+            self._ensure_thread()
+            self.requests += 1
+            self._pending_requests += 1
+            self._pending_rows += new_rows
+            if self._first_pending_at is None:
+                self._first_pending_at = time.time()
+            self._cond.notify()
+
+    def flush(self):
+        """Retrain as soon as possible if any rows are pending."""
+        with self._cond:
+            self._ensure_thread()
+            self._flush_requested = True
+            self._cond.notify()
+
+    def queue_depth(self):
+        with self._cond:
+            return self._pending_rows
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queue_depth": self._pending_rows,
+                "pending_requests": self._pending_requests,
+                "retrain_running": self._running,
+                "window_seconds": self.window_seconds,
+                "min_new_rows": self.min_new_rows,
+                "requests": self.requests,
+                "runs": self.runs,
+                "superseded": self.superseded,
+                "failures": self.failures,
+                "last_run": dict(self.last_run) if self.last_run else None,
+            }
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="newsblink-retrain-scheduler", daemon=True)
+            self._thread.start()
+
+    def _seconds_until_due(self):
+        if self._pending_rows == 0:
+            return None
+        if self._flush_requested or self._pending_rows >= self.min_new_rows:
+            return 0
+        return max(0.0, self._first_pending_at + self.window_seconds - time.time())
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                wait = self._seconds_until_due()
+                while wait is None or wait > 0:
+                    self._cond.wait(timeout=wait)
+                    wait = self._seconds_until_due()
+                rows = self._pending_rows
+                requests = self._pending_requests
+                # Every request folded into this run beyond the first is a retrain we skip
+                self.superseded += requests - 1
+                self._pending_rows = 0
+                self._pending_requests = 0
+                self._first_pending_at = None
+                self._flush_requested = False
+                self._running = True
+
+            started = time.time()
+            error = None
+            logging.info(f"[BG] Retraining with {rows} new row(s) from {requests} request(s).")
+            try:
+                self.retrain_fn()
+            except Exception as e:
+                error = str(e)
+                logging.error(f"[BG] Scheduled retrain failed: {e}")
+                record_failure("retrain", e)
+            STAGE_SECONDS.observe(time.time() - started, stage="retrain")
+
+            with self._cond:
+                self._running = False
+                self.runs += 1
+                if error:
+                    self.failures += 1
+                self.last_run = {
+                    "started_at": started,
+                    "duration_seconds": round(time.time() - started, 3),
+                    "rows": rows,
+                    "requests": requests,
+                    "error": error,
+                }
@@ -1,17 +1,18 @@
-import pandas as pd
-import pickle
 from collections import Counter
 from threading import Lock
 try:
-    from .clustering import train_agnes_clustering
-    from .modified_preprocessing import preprocess_for_clustering
+    from .clustering import train_agnes_clustering, get_bert_model
+    from .embedding_store import EmbeddingStore
+    from .dataset_store import get_dataset_store
+    from .model_registry import registry
+    from .modified_preprocessing import preprocess_batch
 except ImportError:
-    from clustering import train_agnes_clustering
-    from modified_preprocessing import preprocess_for_clustering
+    from clustering import train_agnes_clustering, get_bert_model
+    from embedding_store import EmbeddingStore
+    from dataset_store import get_dataset_store
+    from model_registry import registry
+    from modified_preprocessing import preprocess_batch
 
-DATASET_PATH = "backend/datasets/Research_project_Dataset_1.xlsx"
-MODEL_PATH = "backend/models/agnes_model.pkl"
-CATEGORY_MAPPING_PATH = "backend/models/cluster_category_mapping.pkl"
 
 # Global lock for dataset/model access
 DATASET_LOCK = Lock()
@@ -45,20 +46,21 @@ def match_clusters_to_categories(cluster_keywords, category_keywords):
 
 def retrain_model():
     with DATASET_LOCK:
-        df = pd.read_excel(DATASET_PATH)
+        df = get_dataset_store().read_frame(["Summary", "Category"])
         # Preprocess summaries for clustering
-        df["Processed_Summary"] = df["Summary"].astype(str).apply(preprocess_for_clustering)
+        df["Processed_Summary"] = preprocess_batch(df["Summary"].astype(str).tolist())
         # Retrain clustering model
         summaries = df["Processed_Summary"].dropna().tolist()
-        model_data = train_agnes_clustering(summaries)
+        # Only summaries that are new or changed since the last retrain get encoded
+        store = EmbeddingStore()
+        embeddings = store.embed(summaries, lambda texts: get_bert_model().encode(texts, convert_to_numpy=True))
+        store.save(keep_texts=summaries)
+        model_data = train_agnes_clustering(summaries, embeddings=embeddings)
         df["Cluster"] = model_data["labels"]
         # Extract keywords
         category_keywords = get_top_words(df, column="Summary", category_column="Category")
         cluster_keywords = get_top_words(df, column="Summary", category_column="Cluster")
         # Map clusters to categories
         cluster_to_category = match_clusters_to_categories(cluster_keywords, category_keywords)
-        # Save model and mapping
-        with open(MODEL_PATH, "wb") as f:
-            pickle.dump(model_data, f)
-        with open(CATEGORY_MAPPING_PATH, "wb") as f:
-            pickle.dump(cluster_to_category, f) 
\ No newline at end of file
+        # Publish model and mapping together as a new registry version
+        return registry.publish(model_data, cluster_to_category) 
\ No newline at end of file
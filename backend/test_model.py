@@ -1,4 +1,3 @@
-import pickle
 try:
     from .clustering import classify_new_summary
     from .modified_preprocessing import clean_text  # Ensure text is preprocessed before prediction
@@ -8,17 +7,7 @@ except ImportError:
     from modified_preprocessing import clean_text  # Ensure text is preprocessed before prediction
     from utils import get_category_name
 
-# Paths
-MODEL_PATH = "backend/models/agnes_model.pkl"
-CATEGORY_MAPPING_PATH = "backend/models/cluster_category_mapping.pkl"
-
-# Load trained AGNES model
-with open(MODEL_PATH, "rb") as f:
-    spectral_model = pickle.load(f)
-
-# Load category mapping
-with open(CATEGORY_MAPPING_PATH, "rb") as f:
-    cluster_to_category = pickle.load(f)
+# The trained AGNES model and category mapping come from the model registry (see model_registry)
 
 def test_model(summary):
     """Predict the cluster and category for a given summary."""
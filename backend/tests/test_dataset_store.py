@@ -0,0 +1,71 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from backend.dataset_store import (SQLiteDatasetStore, COLUMNS, TRANSCRIPT_COLUMN, SUMMARY_COLUMN,
+                                   CATEGORY_COLUMN)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteDatasetStore(str(tmp_path / "dataset.sqlite3"), seed_paths=())
+
+
+def write_workbook(path, n_rows):
+    pd.DataFrame({
+        TRANSCRIPT_COLUMN: [f"transcript {i}" for i in range(n_rows)],
+        SUMMARY_COLUMN: [f"summary {i}" for i in range(n_rows)],
+        CATEGORY_COLUMN: [f"category {i % 3}" for i in range(n_rows)],
+    }).to_excel(path, index=False)
+    return str(path)
+
+
+def test_append_returns_row_positions(store):
+    assert store.count() == 0
+    assert [store.append(f"t{i}", f"s{i}", "c") for i in range(3)] == [0, 1, 2]
+    assert store.count() == 3
+
+
+def test_read_frame_from_start_position(store):
+    for i in range(5):
+        store.append(f"t{i}", f"s{i}", "c")
+    frame = store.read_frame([SUMMARY_COLUMN], start=3)
+    assert list(frame.columns) == [SUMMARY_COLUMN]
+    assert frame[SUMMARY_COLUMN].tolist() == ["s3", "s4"]
+    assert list(store.read_frame().columns) == COLUMNS
+
+
+def test_read_rows_keeps_caller_order_and_skips_missing(store):
+    for i in range(5):
+        store.append(f"t{i}", f"s{i}", f"c{i}")
+    rows = store.read_rows([4, 0, 7, -1], [SUMMARY_COLUMN, CATEGORY_COLUMN])
+    assert list(rows) == [4, 0]
+    assert rows[4] == {SUMMARY_COLUMN: "s4", CATEGORY_COLUMN: "c4"}
+    assert store.read_rows([]) == {}
+
+
+def test_seed_workbook_is_imported_once(tmp_path):
+    seed = write_workbook(tmp_path / "seed.xlsx", 4)
+    path = str(tmp_path / "dataset.sqlite3")
+    store = SQLiteDatasetStore(path, seed_paths=(seed,))
+    assert store.count() == 4
+    assert store.import_xlsx(seed) == 0
+    assert SQLiteDatasetStore(path, seed_paths=(seed,)).count() == 4
+    assert store.append("new", "summary", "category") == 4
+
+
+def test_import_rejects_missing_columns(store, tmp_path):
+    path = tmp_path / "bad.xlsx"
+    pd.DataFrame({TRANSCRIPT_COLUMN: ["t"]}).to_excel(path, index=False)
+    with pytest.raises(ValueError):
+        store.import_xlsx(str(path))
+
+
+def test_gaps_in_row_ids_are_rejected(store):
+    for i in range(3):
+        store.append(f"t{i}", f"s{i}", "c")
+    with sqlite3.connect(store.path) as conn:
+        conn.execute("DELETE FROM news WHERE id = 2")
+    with pytest.raises(ValueError):
+        SQLiteDatasetStore(store.path, seed_paths=())
@@ -0,0 +1,66 @@
+import pytest
+
+from backend.dedup_index import DedupIndex, MinHasher, lsh_params
+
+STORY = ("The city council approved a new budget on Tuesday that raises spending on public transport, "
+         "repairs to school buildings and a pilot programme for free childcare in three districts. "
+         "Opposition members said the plan relies on optimistic revenue forecasts and will need to be "
+         "revisited before the end of the year if tax receipts fall short of expectations.")
+OTHER_STORY = ("Heavy rain flooded several roads in the northern province overnight, and the weather service "
+               "has warned of more storms over the weekend while emergency crews clear fallen trees.")
+
+
+@pytest.fixture
+def index(tmp_path):
+    return DedupIndex(str(tmp_path / "dedup.sqlite3"), threshold=0.85)
+
+
+def test_exact_duplicate(index):
+    index.add(STORY, row=7)
+    match = index.check(STORY)
+    assert (match.kind, match.row, match.similarity) == ("exact", 7, 1.0)
+
+
+def test_near_duplicate(index):
+    index.add(STORY, row=3)
+    match = index.check(STORY + " Officials will publish the details next week.")
+    assert match.kind == "near"
+    assert match.row == 3
+    assert match.similarity >= 0.85
+
+
+def test_unrelated_transcript_is_not_a_duplicate(index):
+    index.add(STORY, row=0)
+    assert index.check(OTHER_STORY) is None
+
+
+def test_rebuild_replaces_the_index(index):
+    index.add(OTHER_STORY, row=0)
+    assert index.rebuild([STORY, "", None, OTHER_STORY]) == 2
+    assert index.count() == 2
+    assert index.check(OTHER_STORY).row == 3
+
+
+def test_index_reopens_with_its_entries(index):
+    index.add(STORY, row=1)
+    reopened = DedupIndex(index.path, threshold=0.85)
+    assert reopened.check(STORY).row == 1
+
+
+def test_changed_parameters_clear_the_index(index):
+    index.add(STORY, row=1)
+    assert DedupIndex(index.path, threshold=0.5).count() == 0
+
+
+def test_minhash_estimates_jaccard_similarity():
+    hasher = MinHasher()
+    signature = hasher.signature(STORY)
+    assert hasher.similarity(signature, hasher.signature(STORY)) == 1.0
+    assert hasher.similarity(signature, hasher.signature(OTHER_STORY)) < 0.1
+
+
+def test_lsh_params_cover_all_permutations():
+    bands, rows = lsh_params(128, 0.85)
+    assert bands * rows == 128
+    # The S-curve threshold sits at or below the requested similarity
+    assert (1.0 / bands) ** (1.0 / rows) <= 0.85
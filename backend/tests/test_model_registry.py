@@ -0,0 +1,117 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from backend.model_registry import (ModelRegistry, ModelFormatError, write_artifact, read_artifact,
+                                    SEED_DIR, MODEL_FILE, MAPPING_FILE)
+
+
+def model_data(n_rows=20, n_clusters=3, dims=8, seed=0):
+    rng = np.random.RandomState(seed)
+    return {
+        "embeddings": rng.normal(size=(n_rows, dims)).astype(np.float32),
+        "labels": [i % n_clusters for i in range(n_rows)],
+        "centroids": rng.normal(size=(n_clusters, dims)).astype(np.float32),
+    }
+
+
+MAPPING = {0: "crime", 1: "health", 2: "economy"}
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path / "registry"), seed_dir=None)
+
+
+def test_publish_and_load_round_trip(registry):
+    data = model_data()
+    version = registry.publish(data, MAPPING, model_name="test-model")
+    assert version == "v000001"
+    assert registry.current_version() == version
+
+    bundle = registry.load(version)
+    assert bundle.category_mapping == MAPPING
+    assert bundle.get_category_name(2) == "economy"
+    assert bundle.manifest["model_name"] == "test-model"
+    assert bundle.manifest["rows"] == 20
+    np.testing.assert_array_equal(bundle.model_data["centroids"], data["centroids"])
+    np.testing.assert_array_equal(bundle.model_data["labels"], data["labels"])
+    # Training embeddings are memory-mapped, not read in
+    assert isinstance(bundle.model_data["embeddings"], np.memmap)
+
+
+def test_verify_detects_corrupt_arrays(registry):
+    version = registry.publish(model_data(), MAPPING)
+    directory = os.path.join(registry.root, version)
+    registry.load(version).model_data.verify()
+    with open(os.path.join(directory, "embeddings.npy"), "r+b") as f:
+        f.seek(-4, os.SEEK_END)
+        f.write(b"\xff\xff\xff\xff")
+    with pytest.raises(ModelFormatError):
+        registry.load(version).model_data.verify()
+
+
+def test_rollback_and_prune(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"), keep_versions=2, seed_dir=None)
+    versions = [registry.publish(model_data(seed=i), MAPPING) for i in range(3)]
+    assert registry.list_versions() == versions[1:]
+    assert registry.rollback() == versions[1]
+    assert registry.current_version() == versions[1]
+    with pytest.raises(ValueError):
+        registry.rollback()
+    with pytest.raises(ValueError):
+        registry.rollback("v999999")
+
+
+def test_empty_registry_bootstraps_from_seed_without_unpickling(tmp_path, monkeypatch):
+    seed_dir = tmp_path / "seed"
+    seed_dir.mkdir()
+    data = model_data()
+    write_artifact(str(seed_dir), data, MAPPING, "test-model")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the bootstrap must not unpickle anything")
+
+    monkeypatch.setattr(pickle, "load", fail)
+    registry = ModelRegistry(str(tmp_path / "registry"), seed_dir=str(seed_dir))
+    assert registry.current_version() == "v000001"
+    bundle = registry.load("v000001")
+    assert bundle.category_mapping == MAPPING
+    np.testing.assert_array_equal(bundle.model_data["centroids"], data["centroids"])
+    # Only an empty registry is seeded
+    registry.publish(model_data(seed=1), MAPPING)
+    assert registry.current_version() == "v000002"
+
+
+def test_export_seed_round_trip(registry, tmp_path):
+    registry.seed_dir = str(tmp_path / "seed")
+    version = registry.publish(model_data(), MAPPING, model_name="test-model")
+    registry.export_seed()
+    _, mapping, manifest = read_artifact(registry.seed_dir)
+    assert mapping == MAPPING
+    assert manifest["checksum"] == registry.load(version).manifest["checksum"]
+
+
+def test_committed_seed_artifact_is_valid():
+    artifact, mapping, manifest = read_artifact(SEED_DIR)
+    artifact.verify()
+    assert artifact["centroids"].shape == (manifest["n_clusters"], manifest["dims"])
+    assert set(mapping) == set(range(manifest["n_clusters"]))
+
+
+def test_convert_rewrites_pickled_versions(registry):
+    directory = os.path.join(registry.root, "v000001")
+    os.makedirs(directory)
+    with open(os.path.join(directory, MODEL_FILE), "wb") as f:
+        pickle.dump(model_data(), f)
+    with open(os.path.join(directory, MAPPING_FILE), "wb") as f:
+        pickle.dump(MAPPING, f)
+    registry._set_current("v000001")
+    with pytest.raises(ModelFormatError):
+        registry.load("v000001")
+
+    assert registry.convert("test-model") == ["v000001"]
+    assert not os.path.exists(os.path.join(directory, MODEL_FILE))
+    assert registry.load("v000001").category_mapping == MAPPING
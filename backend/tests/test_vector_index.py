@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from backend import vector_index
+from backend.dataset_store import SQLiteDatasetStore
+from backend.vector_index import VectorIndex
+
+DIMS = 16
+
+
+def clustered_vectors(n_rows=300, n_clusters=4, seed=0):
+    rng = np.random.RandomState(seed)
+    centroids = rng.normal(size=(n_clusters, DIMS)).astype(np.float32) * 5
+    labels = np.arange(n_rows) % n_clusters
+    vectors = centroids[labels] + rng.normal(size=(n_rows, DIMS)).astype(np.float32)
+    return centroids, vectors, labels
+
+
+def brute_force(vectors, query, k):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return list(np.argsort(-scores, kind="stable")[:k])
+
+
+def test_exact_search_matches_brute_force():
+    centroids, vectors, labels = clustered_vectors()
+    index = VectorIndex(centroids, block_rows=64)
+    index.add(vectors, np.arange(len(vectors)), labels)
+    assert index.mode == "exact"
+    query = vectors[10] + 0.1
+    results = index.search(query, k=5)
+    assert [row for row, _, _ in results] == brute_force(vectors, query, 5)
+    assert results[0][2] == labels[10]
+    assert results[0][1] == pytest.approx(max(score for _, score, _ in results))
+
+
+def test_search_excludes_rows_and_filters_by_cluster():
+    centroids, vectors, labels = clustered_vectors()
+    index = VectorIndex(centroids)
+    index.add(vectors, np.arange(len(vectors)), labels)
+    results = index.search(vectors[10], k=3, exclude_rows=[10])
+    assert len(results) == 3
+    assert 10 not in [row for row, _, _ in results]
+    in_cluster = index.search(vectors[10], k=10, cluster=1)
+    assert {cluster for _, _, cluster in in_cluster} == {1}
+
+
+def test_ivf_search_finds_the_nearest_rows_of_the_probed_clusters():
+    centroids, vectors, labels = clustered_vectors()
+    index = VectorIndex(centroids, exact_max_rows=0, nprobe=1)
+    index.add(vectors, np.arange(len(vectors)))
+    assert index.mode == "ivf"
+    query = vectors[42]
+    results = index.search(query, k=5)
+    assert results[0][0] == 42
+    assert all(cluster == index.nearest_cluster(query) for _, _, cluster in results)
+
+
+def test_add_grows_across_calls():
+    centroids, vectors, labels = clustered_vectors(n_rows=2500)
+    index = VectorIndex(centroids)
+    for start in range(0, len(vectors), 700):
+        rows = np.arange(start, min(len(vectors), start + 700))
+        index.add(vectors[rows], rows)
+    assert len(index) == len(vectors)
+    assert index.next_row == len(vectors)
+    assert index.search(vectors[2400], k=1)[0][0] == 2400
+
+
+def test_catch_up_embeds_appended_rows(tmp_path, monkeypatch):
+    centroids, vectors, _ = clustered_vectors(n_rows=8)
+    embedded = {f"summary {i}": vectors[i] for i in range(len(vectors))}
+    monkeypatch.setattr(vector_index, "embed_for_index", lambda texts: np.stack([embedded[t] for t in texts]))
+    store = SQLiteDatasetStore(str(tmp_path / "dataset.sqlite3"), seed_paths=())
+    for i in range(5):
+        store.append(f"transcript {i}", f"summary {i}", "c")
+
+    index = VectorIndex(centroids)
+    index.add(vectors[:3], np.arange(3))
+    assert index.catch_up(store) == 2
+    assert index.catch_up(store) == 0
+    store.append("transcript 5", "summary 5", "c")
+    assert index.catch_up(store) == 1
+    assert len(index) == 6
+    assert index.search(vectors[5], k=1)[0][0] == 5
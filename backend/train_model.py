@@ -1,13 +1,10 @@
 import pandas as pd
-import pickle
 from collections import Counter
 from clustering import train_agnes_clustering
+from model_registry import registry
 
 # Paths
 DATASET_PATH = "backend/datasets/Research_project_Dataset_1.xlsx"
-MODEL_PATH = "backend/models/agnes_model.pkl"
-# MODEL_PATH = "backend/models/spectral_model.pkl"
-CATEGORY_MAPPING_PATH = "backend/models/cluster_category_mapping.pkl"
 
 # Load dataset
 df = pd.read_excel(DATASET_PATH)
@@ -73,13 +70,9 @@ def match_clusters_to_categories(cluster_keywords, category_keywords):
 # Assign clusters to categories
 cluster_to_category = match_clusters_to_categories(cluster_keywords, category_keywords)
 
-# Save the complete clustering model dictionary
-with open(MODEL_PATH, "wb") as f:
-    pickle.dump(model_data, f)  # Saving full dictionary with "centroids" and "labels"
-
-# Save category-cluster mapping
-with open(CATEGORY_MAPPING_PATH, "wb") as f:
-    pickle.dump(cluster_to_category, f)
+# Publish the model dictionary ("centroids", "labels", ...) and category mapping as one registry version
+version = registry.publish(model_data, cluster_to_category)
+print(f"Published model version {version}")
 
 print("AGNES Model Training & Category Mapping Completed & Saved!")
 # print("Spectral Model Training & Category Mapping Completed & Saved!")
\ No newline at end of file
@@ -0,0 +1,340 @@
+"""Transcript fetching for NewsBlink backend.
+
+TranscriptFetcher puts a pluggable source behind a persistent per-video
+store, so a transcript is downloaded at most once:
+
+- Sources keep one pooled requests.Session per thread, with a default timeout
+  on every request.
+- At most NEWSBLINK_TRANSCRIPT_CONCURRENCY downloads run at a time, and
+  concurrent requests for the same video share one download.
+- Transient failures are retried with exponential backoff and full jitter.
+  Permanent ones, such as disabled captions, fail at once with
+  TranscriptUnavailable.
+- Downloaded transcripts are stored gzip-compressed under
+  NEWSBLINK_TRANSCRIPT_DIR.
+
+NEWSBLINK_TRANSCRIPT_SOURCE=http with NEWSBLINK_TRANSCRIPT_SOURCE_URL points
+the fetcher at a fixture server instead of YouTube, for tests and benchmarks.
+Serve a directory of <video_id>.txt or <video_id>.json files with:
+
+    python backend/transcript_fetcher.py serve-fixtures --dir fixtures --port 8765
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+try:
+    from .metrics import time_stage, record_cache, record_failure
+except ImportError:
+    from metrics import time_stage, record_cache, record_failure
+
+TRANSCRIPT_DIR = os.environ.get("NEWSBLINK_TRANSCRIPT_DIR", "backend/cache/transcripts")
+TRANSCRIPT_SOURCE = os.environ.get("NEWSBLINK_TRANSCRIPT_SOURCE", "youtube")
+TRANSCRIPT_SOURCE_URL = os.environ.get("NEWSBLINK_TRANSCRIPT_SOURCE_URL", "http://127.0.0.1:8765")
+TRANSCRIPT_CONCURRENCY = int(os.environ.get("NEWSBLINK_TRANSCRIPT_CONCURRENCY", "4"))
+TRANSCRIPT_RETRIES = int(os.environ.get("NEWSBLINK_TRANSCRIPT_RETRIES", "3"))
+TRANSCRIPT_TIMEOUT = float(os.environ.get("NEWSBLINK_TRANSCRIPT_TIMEOUT", "10"))
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 8.0
+POOL_CONNECTIONS = 8
+
+# youtube_transcript_api errors that retrying will not fix, and the message returned for each
+PERMANENT_ERRORS = {
+    "TranscriptsDisabled": "Transcripts are disabled for this video",
+    "NoTranscriptFound": "No transcript available for this video",
+    "NoTranscriptAvailable": "No transcript available for this video",
+    "VideoUnavailable": "Video is unavailable or private",
+    "InvalidVideoId": "Invalid YouTube URL - could not extract video ID",
+    "AgeRestricted": "Transcript extraction failed - video may not have captions or may be restricted",
+}
+
+
+class TranscriptUnavailable(Exception):
+    """The video has no usable transcript; retrying will not help."""
+
+
+class _TimeoutAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to every request."""
+
+    def __init__(self, timeout, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class PooledSessions:
+    """One keep-alive requests.Session per thread (Session is not thread-safe)."""
+
+    def __init__(self, timeout=TRANSCRIPT_TIMEOUT, pool_size=POOL_CONNECTIONS):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._local = threading.local()
+
+    def get(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = _TimeoutAdapter(self.timeout, pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._local.session = session
+        return session
+
+
+def _join_segments(segments):
+    return " ".join(entry["text"] if isinstance(entry, dict) else entry.text for entry in segments)
+
+
+class YouTubeSource:
+    """Fetches captions through youtube_transcript_api over pooled sessions."""
+
+    name = "youtube"
+
+    def __init__(self, sessions=None):
+        from youtube_transcript_api import YouTubeTranscriptApi
+        self.api_class = YouTubeTranscriptApi
+        self.sessions = sessions or PooledSessions()
+        # youtube-transcript-api >= 1.0 accepts a session; older releases only have classmethods
+        self.supports_session = hasattr(YouTubeTranscriptApi, "fetch")
+
+    def _api(self):
+        if self.supports_session:
+            return self.api_class(http_client=self.sessions.get())
+        return None
+
+    def fetch(self, video_id):
+        api = self._api()
+        try:
+            segments = api.fetch(video_id) if api else self.api_class.get_transcript(video_id)
+        except Exception as e:
+            if _permanent_message(e) is None:
+                raise
+            print(f"=== DEBUG: Default transcript unavailable ({type(e).__name__}), trying transcript list ===")
+            # No transcript in the default language; take the first one that can be fetched
+            transcript_list = api.list(video_id) if api else self.api_class.list_transcripts(video_id)
+            for transcript_obj in transcript_list:
+                try:
+                    segments = transcript_obj.fetch()
+                except Exception as inner_e:
+                    print(f"=== DEBUG: Failed to fetch transcript: {inner_e} ===")
+                    continue
+                if segments:
+                    return _join_segments(segments)
+            raise TranscriptUnavailable(_permanent_message(e))
+        if not segments:
+            raise TranscriptUnavailable("No transcript available for this video")
+        return _join_segments(segments)
+
+
+class HTTPSource:
+    """Fetches GET {base_url}/transcripts/{video_id} from a fixture server.
+
+    The response is plain text, or JSON: {"text": ...} or a list of
+    {"text": ...} segments. 404 means the video has no transcript.
+    """
+
+    name = "http"
+
+    def __init__(self, base_url=TRANSCRIPT_SOURCE_URL, sessions=None):
+        self.base_url = base_url.rstrip("/")
+        self.sessions = sessions or PooledSessions()
+
+    def fetch(self, video_id):
+        response = self.sessions.get().get(f"{self.base_url}/transcripts/{video_id}")
+        if response.status_code == 404:
+            raise TranscriptUnavailable("No transcript available for this video")
+        response.raise_for_status()
+        if "json" not in response.headers.get("Content-Type", ""):
+            return response.text
+        data = response.json()
+        return data["text"] if isinstance(data, dict) else _join_segments(data)
+
+
+SOURCES = {"youtube": YouTubeSource, "http": HTTPSource}
+
+
+def _permanent_message(error):
+    if isinstance(error, TranscriptUnavailable):
+        return str(error)
+    for cls in type(error).__mro__:
+        if cls.__name__ in PERMANENT_ERRORS:
+            return PERMANENT_ERRORS[cls.__name__]
+    return None
+
+
+class TranscriptStore:
+    """Gzip-compressed transcripts on disk, one file per video ID."""
+
+    def __init__(self, root=TRANSCRIPT_DIR):
+        self.root = root
+
+    def _path(self, video_id):
+        # Shard by prefix so one directory doesn't collect every transcript
+        return os.path.join(self.root, video_id[:2], f"{video_id}.json.gz")
+
+    def get(self, video_id):
+        try:
+            with gzip.open(self._path(video_id), "rt", encoding="utf-8") as f:
+                return json.load(f)["text"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Ignoring unreadable stored transcript for {video_id}: {e}")
+            return None
+
+    def put(self, video_id, text, source=None):
+        path = self._path(video_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"video_id": video_id, "source": source, "fetched_at": time.time(), "text": text}, f)
+        os.replace(tmp_path, path)
+
+
+class TranscriptFetcher:
+    """Store-first transcript fetcher with bounded concurrency and jittered retries."""
+
+    def __init__(self, source=None, store=None, max_concurrency=TRANSCRIPT_CONCURRENCY,
+                 retries=TRANSCRIPT_RETRIES):
+        self.source = source or SOURCES[TRANSCRIPT_SOURCE]()
+        self.store = store or TranscriptStore()
+        self.retries = max(0, retries)
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self.store_hits = 0
+        self.downloads = 0
+
+    def _key_lock(self, video_id):
+        with self._lock:
+            return self._key_locks.setdefault(video_id, threading.Lock())
+
+    def fetch(self, video_id):
+        """Transcript text for video_id, downloading it only if it is not stored yet."""
+        with time_stage("transcript_fetch"):
+            return self._fetch(video_id)
+
+    def _fetch(self, video_id):
+        text = self.store.get(video_id)
+        if text is not None:
+            self.store_hits += 1
+            record_cache("transcript", True)
+            return text
+        # The same video requested twice at once: the second caller waits and reads the store
+        try:
+            with self._key_lock(video_id):
+                text = self.store.get(video_id)
+                if text is None:
+                    record_cache("transcript", False)
+                    text = self._download(video_id)
+                    if text.strip():
+                        self.store.put(video_id, text, self.source.name)
+                else:
+                    self.store_hits += 1
+                    record_cache("transcript", True)
+        finally:
+            # Also when the download fails, so failed ids do not accumulate
+            with self._lock:
+                self._key_locks.pop(video_id, None)
+        return text
+
+    def _download(self, video_id):
+        for attempt in range(self.retries + 1):
+            try:
+                with self._slots:
+                    self.downloads += 1
+                    text = self.source.fetch(video_id)
+                print(f"=== DEBUG: Downloaded transcript for {video_id} ({len(text)} chars) ===")
+                return text
+            except Exception as e:
+                message = _permanent_message(e)
+                if message is not None:
+                    record_failure("transcript_fetch", TranscriptUnavailable(message))
+                    raise TranscriptUnavailable(message) from e
+                if attempt == self.retries:
+                    record_failure("transcript_fetch", e)
+                    raise
+                # Full jitter keeps retries from many workers from arriving together
+                delay = random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+                logging.warning(f"Transcript fetch for {video_id} failed ({e}); retry {attempt + 1}/{self.retries} in {delay:.2f}s")
+                time.sleep(delay)
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_transcript_fetcher():
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = TranscriptFetcher()
+        return _fetcher
+
+
+def serve_fixtures(directory, host="127.0.0.1", port=8765):
+    """Serve <directory>/<video_id>.txt|.json as GET /transcripts/<video_id> (for HTTPSource)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so pooled sessions are exercised
+
+        def do_GET(self):
+            prefix = "/transcripts/"
+            video_id = self.path[len(prefix):] if self.path.startswith(prefix) else ""
+            for extension, content_type in ((".json", "application/json"), (".txt", "text/plain; charset=utf-8")):
+                path = os.path.join(directory, os.path.basename(video_id) + extension)
+                if video_id and os.path.isfile(path):
+                    with open(path, "rb") as f:
+                        body = f.read()
+                    self.send_response(200)
+                    self.send_header("Content-Type", content_type)
+                    break
+            else:
+                body = b"not found"
+                self.send_response(404)
+                self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), FixtureHandler)
+    print(f"Serving transcript fixtures from {directory} on http://{host}:{port}")
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcript fetcher utilities.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve = subparsers.add_parser("serve-fixtures", help="serve transcript fixtures over HTTP")
+    serve.add_argument("--dir", required=True)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    fetch = subparsers.add_parser("fetch", help="fetch and store transcripts")
+    fetch.add_argument("video_ids", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "serve-fixtures":
+        serve_fixtures(args.dir, args.host, args.port)
+    else:
+        fetcher = get_transcript_fetcher()
+        for video_id in args.video_ids:
+            try:
+                print(f"{video_id}: {len(fetcher.fetch(video_id))} chars")
+            except Exception as e:
+                print(f"{video_id}: {e}")
+
+
+if __name__ == "__main__":
+    main()
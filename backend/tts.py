@@ -0,0 +1,352 @@
+"""Text-to-speech with a content-addressed audio cache for NewsBlink backend.
+
+Audio files are named by a hash of (text, lang, engine), so concurrent
+requests never overwrite each other's audio and identical summaries are only
+synthesized once. The audio directory is evicted by age and total size.
+Set NEWSBLINK_TTS_BACKEND=stub to use an offline backend that writes silent
+MP3 audio without any network access (tests, benchmarks).
+
+Long summaries are split at sentence boundaries and the segments are
+synthesized concurrently (see ProgressiveAudio). Clients can start playback
+from the first segment through the chunked stream or the HLS playlist while
+the rest is still being synthesized; the joined file is written once all
+segments are done.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from .metrics import STAGE_SECONDS, time_stage, record_cache, record_failure
+except ImportError:
+    from metrics import STAGE_SECONDS, time_stage, record_cache, record_failure
+
+AUDIO_DIR = os.path.join("static", "audio")
+TTS_BACKEND = os.environ.get("NEWSBLINK_TTS_BACKEND", "gtts")
+AUDIO_CACHE_MAX_BYTES = int(os.environ.get("NEWSBLINK_AUDIO_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+AUDIO_CACHE_MAX_AGE = int(os.environ.get("NEWSBLINK_AUDIO_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+EVICT_INTERVAL_SECONDS = 60
+AUDIO_PREFIX = "tts-"
+TTS_SEGMENT_WORKERS = int(os.environ.get("NEWSBLINK_TTS_SEGMENT_WORKERS", "4"))
+TTS_SEGMENT_MAX_CHARS = int(os.environ.get("NEWSBLINK_TTS_SEGMENT_MAX_CHARS", "300"))
+# Used only to estimate segment durations for the playlist
+AUDIO_BITRATE_BPS = 32000
+STREAM_READ_SIZE = 64 * 1024
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+_AUDIO_KEY = re.compile(r'[0-9a-f]{32}')
+
+
+class GTTSBackend:
+    """Google Translate TTS (network)."""
+
+    name = "gtts"
+
+    def synthesize(self, text, lang, path):
+        from gtts import gTTS
+        gTTS(text=text, lang=lang).save(path)
+
+
+class OfflineStubBackend:
+    """Writes silent MP3 audio roughly as long as the text would take to read."""
+
+    name = "stub"
+    # MPEG-1 Layer III, 32 kbps, 44.1 kHz, mono: 104-byte frames of 26 ms
+    _FRAME = bytes([0xFF, 0xFB, 0x10, 0xC0]) + bytes(100)
+    _FRAMES_PER_SECOND = 38
+    _CHARS_PER_SECOND = 15
+
+    def synthesize(self, text, lang, path):
+        seconds = max(1, len(text) // self._CHARS_PER_SECOND)
+        with open(path, "wb") as f:
+            f.write(self._FRAME * (seconds * self._FRAMES_PER_SECOND))
+
+
+BACKENDS = {"gtts": GTTSBackend, "stub": OfflineStubBackend}
+
+
+def audio_key(text, lang, engine):
+    return hashlib.sha256(f"{engine}\0{lang}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+
+def split_for_tts(text, max_chars=TTS_SEGMENT_MAX_CHARS):
+    """Split text at sentence boundaries into segments of at most ~max_chars."""
+    segments = []
+    current = ""
+    for sentence in _SENTENCE_SPLIT.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            segments.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        segments.append(current)
+    return segments or [text]
+
+
+class ProgressiveAudio:
+    """Audio for one text, synthesized as concurrent per-sentence segments."""
+
+    def __init__(self, service, file_name, segment_texts=(), lang="en"):
+        self.service = service
+        self.lang = lang
+        self.file_name = file_name
+        self.key = file_name[len(AUDIO_PREFIX):-len(".mp3")]
+        self.segment_texts = list(segment_texts)
+        self.futures = []
+        self.error = None
+        self._remaining = len(self.segment_texts)
+        self._started = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def path(self):
+        return os.path.join(self.service.audio_dir, self.file_name)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def start(self, executor):
+        if os.path.exists(self.path):
+            os.utime(self.path)
+            self._done.set()
+            return self
+        self._started = time.perf_counter()
+        self.futures = [executor.submit(self.service.synthesize, segment, self.lang)
+                        for segment in self.segment_texts]
+        for future in self.futures:
+            future.add_done_callback(self._segment_done)
+        return self
+
+    def _segment_done(self, future):
+        if future.exception() is not None and self.error is None:
+            self.error = future.exception()
+        with self._lock:
+            self._remaining -= 1
+            finished = self._remaining == 0
+        if finished:
+            try:
+                if self.error is None:
+                    self._join_segments()
+            except Exception as e:
+                self.error = e
+            finally:
+                if self.error is not None:
+                    logging.error(f"TTS synthesis failed for {self.file_name}: {self.error}")
+                    record_failure("tts", self.error)
+                else:
+                    # Whole text, from the first segment starting to the joined file
+                    STAGE_SECONDS.observe(time.perf_counter() - self._started, stage="tts")
+                self._done.set()
+                self.service._finished(self)
+
+    def _join_segments(self):
+        # MP3 frames are self-contained, so segment files can be concatenated as-is
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as out:
+            for future in self.futures:
+                with open(os.path.join(self.service.audio_dir, future.result()), "rb") as f:
+                    out.write(f.read())
+        os.replace(tmp_path, self.path)
+
+    def wait(self, timeout=None):
+        """Block until the joined file exists; returns its file name."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"TTS for {self.file_name} did not finish in {timeout}s")
+        if self.error is not None:
+            raise self.error
+        return self.file_name
+
+    def ready_segments(self):
+        """File names of the leading segments that are already synthesized."""
+        names = []
+        for future in self.futures:
+            if not future.done() or future.exception() is not None:
+                break
+            names.append(future.result())
+        return names
+
+    def iter_bytes(self):
+        """Yield MP3 bytes in playback order as soon as each segment is ready."""
+        if not self.futures:
+            paths = [self.path]
+        else:
+            paths = (os.path.join(self.service.audio_dir, future.result()) for future in self.futures)
+        for path in paths:
+            with open(path, "rb") as f:
+                while True:
+                    data = f.read(STREAM_READ_SIZE)
+                    if not data:
+                        break
+                    yield data
+
+    def playlist(self, url_prefix="/static/audio"):
+        """HLS media playlist (packed MP3 segments); open-ended until all segments are done."""
+        names = self.ready_segments() if self.futures else [self.file_name]
+        durations = []
+        for name in names:
+            try:
+                size = os.path.getsize(os.path.join(self.service.audio_dir, name))
+            except OSError:
+                size = 0
+            durations.append(max(1.0, size * 8 / AUDIO_BITRATE_BPS))
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{int(max(durations, default=1)) + 1}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        for name, duration in zip(names, durations):
+            lines.append(f"#EXTINF:{duration:.2f},")
+            lines.append(f"{url_prefix}/{name}")
+        if self.done and self.error is None:
+            lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+
+class TTSService:
+    """Synthesizes audio into AUDIO_DIR, reusing files for identical input."""
+
+    def __init__(self, backend=None, audio_dir=AUDIO_DIR, max_bytes=AUDIO_CACHE_MAX_BYTES,
+                 max_age_seconds=AUDIO_CACHE_MAX_AGE):
+        self.backend = backend or BACKENDS[TTS_BACKEND]()
+        self.audio_dir = audio_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self._last_evict = 0.0
+        self._segment_executor = ThreadPoolExecutor(max_workers=TTS_SEGMENT_WORKERS,
+                                                    thread_name_prefix="newsblink-tts")
+        self._in_progress = {}
+        os.makedirs(self.audio_dir, exist_ok=True)
+
+    def file_name(self, text, lang="en"):
+        return f"{AUDIO_PREFIX}{audio_key(text, lang, self.backend.name)}.mp3"
+
+    def _key_lock(self, name):
+        with self._lock:
+            return self._key_locks.setdefault(name, threading.Lock())
+
+    def synthesize(self, text, lang="en"):
+        """Return the file name of the audio for text, synthesizing it only on a miss."""
+        name = self.file_name(text, lang)
+        path = os.path.join(self.audio_dir, name)
+        # Same text in flight twice: the second request waits and reuses the first file
+        try:
+            with self._key_lock(name):
+                if os.path.exists(path):
+                    os.utime(path)  # mark as recently used for eviction
+                    self.hits += 1
+                    record_cache("tts", True)
+                    return name
+                self.misses += 1
+                record_cache("tts", False)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                try:
+                    with time_stage("tts_segment"):
+                        self.backend.synthesize(text, lang, tmp_path)
+                    os.replace(tmp_path, path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+        finally:
+            # Also on hits and failed synthesis, so the lock table does not grow
+            with self._lock:
+                self._key_locks.pop(name, None)
+        self.maybe_evict()
+        return name
+
+    def synthesize_progressive(self, text, lang="en"):
+        """Start segmented synthesis of text and return its ProgressiveAudio right away."""
+        audio = ProgressiveAudio(self, self.file_name(text, lang), split_for_tts(text), lang)
+        with self._lock:
+            existing = self._in_progress.get(audio.key)
+            if existing is not None:
+                return existing
+            self._in_progress[audio.key] = audio
+        audio.start(self._segment_executor)
+        if audio.done:
+            self._finished(audio)
+        return audio
+
+    def get_audio(self, key):
+        """In-progress or finished audio for key, or None if it is unknown or evicted."""
+        if not _AUDIO_KEY.fullmatch(key):
+            return None
+        with self._lock:
+            audio = self._in_progress.get(key)
+        if audio is not None:
+            return audio
+        audio = ProgressiveAudio(self, f"{AUDIO_PREFIX}{key}.mp3")
+        if not os.path.exists(audio.path):
+            return None
+        audio._done.set()
+        return audio
+
+    def _finished(self, audio):
+        with self._lock:
+            if self._in_progress.get(audio.key) is audio:
+                del self._in_progress[audio.key]
+
+    def maybe_evict(self):
+        now = time.time()
+        if now - self._last_evict >= EVICT_INTERVAL_SECONDS:
+            self._last_evict = now
+            self.evict()
+
+    def evict(self):
+        """Remove audio older than max_age_seconds, then least recently used files over max_bytes."""
+        entries = []
+        total = 0
+        now = time.time()
+        for name in os.listdir(self.audio_dir):
+            if not (name.startswith(AUDIO_PREFIX) and name.endswith(".mp3")):
+                continue
+            path = os.path.join(self.audio_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if self.max_age_seconds > 0 and now - stat.st_mtime > self.max_age_seconds:
+                self._remove(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        else:
+            logging.info(f"Evicted audio file {path}")
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_tts_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = TTSService()
+        return _service
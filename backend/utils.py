@@ -1,16 +1,12 @@
 """Utility functions for NewsBlink backend."""
-import pickle
-import os
+try:
+    from .model_registry import get_active_bundle
+except ImportError:
+    from model_registry import get_active_bundle
 
-CATEGORY_MAPPING_PATH = "backend/models/cluster_category_mapping.pkl"
-
-# Load category mapping with validation
-if os.path.exists(CATEGORY_MAPPING_PATH):
-    with open(CATEGORY_MAPPING_PATH, "rb") as f:
-        cluster_to_category = pickle.load(f)
-else:
-    print(f"WARNING: Category mapping file not found at {CATEGORY_MAPPING_PATH}")
-    cluster_to_category = {}
-
-def get_category_name(cluster_id):
-    return cluster_to_category.get(cluster_id, "Unknown")
+def get_category_name(cluster_id, bundle=None):
+    """Category for a cluster, from the given ModelBundle or the active one."""
+    bundle = bundle or get_active_bundle()
+    if bundle is None:
+        return "Unknown"
+    return bundle.get_category_name(cluster_id)
@@ -0,0 +1,218 @@
+"""Nearest-neighbour search over dataset summary embeddings for NewsBlink backend.
+
+Backs the /related endpoint. Each model version gets one VectorIndex, built
+from the embeddings, labels and centroids in its registry artifact: the
+embeddings are normalized once into a float32 matrix, so cosine similarity is
+a plain dot product. Search is
+
+- exact: a blocked matmul over every row, for corpora up to
+  NEWSBLINK_RELATED_EXACT_MAX_ROWS;
+- IVF above that: the model's AGNES clusters are the coarse partitions, and
+  only rows in the NEWSBLINK_RELATED_NPROBE clusters whose centroids are
+  closest to the query are scored.
+
+Rows appended to the dataset after the model was trained are embedded and
+added incrementally (catch_up), until the next retrain publishes a model that
+includes them.
+"""
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+try:
+    from .clustering import get_bert_model, normalize_rows, get_normalized_centroids
+    from .dataset_store import get_dataset_store, SUMMARY_COLUMN
+    from .modified_preprocessing import preprocess_batch
+    from .model_handles import record_timing
+except ImportError:
+    from clustering import get_bert_model, normalize_rows, get_normalized_centroids
+    from dataset_store import get_dataset_store, SUMMARY_COLUMN
+    from modified_preprocessing import preprocess_batch
+    from model_handles import record_timing
+
+RELATED_EXACT_MAX_ROWS = int(os.environ.get("NEWSBLINK_RELATED_EXACT_MAX_ROWS", "50000"))
+RELATED_NPROBE = int(os.environ.get("NEWSBLINK_RELATED_NPROBE", "2"))
+RELATED_BLOCK_ROWS = int(os.environ.get("NEWSBLINK_RELATED_BLOCK_ROWS", "65536"))
+# Appended rows are embedded this many at a time when catching up
+CATCH_UP_BATCH = 256
+
+
+def _top_k(scores, k):
+    """Indices of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class VectorIndex:
+    """Growable matrix of normalized vectors with their dataset rows and clusters."""
+
+    def __init__(self, centroids, exact_max_rows=RELATED_EXACT_MAX_ROWS, nprobe=RELATED_NPROBE,
+                 block_rows=RELATED_BLOCK_ROWS):
+        self.centroids = normalize_rows(centroids)
+        self.exact_max_rows = exact_max_rows
+        self.nprobe = max(1, nprobe)
+        self.block_rows = max(1, block_rows)
+        self.next_row = 0  # dataset rows below this are indexed
+        self._vectors = np.zeros((0, self.centroids.shape[1]), dtype=np.float32)
+        self._rows = np.zeros(0, dtype=np.int64)
+        self._clusters = np.zeros(0, dtype=np.int32)
+        self._size = 0
+        # Inverted lists: cluster -> positions in _vectors
+        self._lists = {cluster: np.zeros(0, dtype=np.int64) for cluster in range(len(self.centroids))}
+        self._lock = threading.Lock()
+        self._catch_up_lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def mode(self):
+        return "exact" if self._size <= self.exact_max_rows else "ivf"
+
+    def assign(self, vectors):
+        """Nearest centroid of each normalized vector."""
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def nearest_cluster(self, query):
+        """Cluster whose centroid is closest to a single (unnormalized) query vector."""
+        return int(self.assign(normalize_rows(np.asarray(query).reshape(1, -1)))[0])
+
+    def add(self, vectors, rows, clusters=None):
+        """Append vectors for the given dataset rows; clusters default to the nearest centroid."""
+        vectors = np.asarray(vectors)
+        count = len(vectors)
+        if count == 0:
+            return
+        rows = np.asarray(rows, dtype=np.int64)
+        with self._lock:
+            start = self._size
+            needed = start + count
+            if needed > len(self._vectors):
+                # Double the capacity so a stream of single-row appends stays O(1) amortized
+                capacity = max(needed, 2 * len(self._vectors), 1024)
+                grown = np.empty((capacity, self._vectors.shape[1]), dtype=np.float32)
+                grown[:start] = self._vectors[:start]
+                self._vectors = grown
+                self._rows = np.concatenate([self._rows[:start], np.zeros(capacity - start, dtype=np.int64)])
+                self._clusters = np.concatenate([self._clusters[:start], np.zeros(capacity - start, dtype=np.int32)])
+            # Normalize in blocks, so a memory-mapped matrix is paged through rather than copied whole
+            for offset in range(0, count, self.block_rows):
+                block = normalize_rows(vectors[offset:offset + self.block_rows])
+                self._vectors[start + offset:start + offset + len(block)] = block
+            new = self._vectors[start:needed]
+            new_clusters = self.assign(new) if clusters is None else np.asarray(clusters, dtype=np.int32)
+            self._rows[start:needed] = rows
+            self._clusters[start:needed] = new_clusters
+            positions = np.arange(start, needed, dtype=np.int64)
+            for cluster in np.unique(new_clusters):
+                self._lists[int(cluster)] = np.concatenate([self._lists.get(int(cluster), np.zeros(0, dtype=np.int64)),
+                                                            positions[new_clusters == cluster]])
+            self._size = needed
+            self.next_row = max(self.next_row, int(rows.max()) + 1)
+
+    def search(self, query, k=5, cluster=None, exclude_rows=()):
+        """[(dataset row, cosine similarity, cluster)] of the k rows closest to query.
+
+        cluster restricts results to one cluster; exclude_rows are skipped.
+        """
+        query = normalize_rows(np.asarray(query).reshape(1, -1))[0]
+        with self._lock:
+            vectors, rows, clusters, size = self._vectors, self._rows, self._clusters, self._size
+            lists = dict(self._lists)
+        exclude = np.asarray(list(exclude_rows), dtype=np.int64)
+        want = k + len(exclude)
+
+        if size > self.exact_max_rows or cluster is not None:
+            if cluster is not None:
+                probe = [int(cluster)]
+            else:
+                probe = _top_k(self.centroids @ query, self.nprobe)
+            positions = np.concatenate([lists.get(int(c), np.zeros(0, dtype=np.int64)) for c in probe])
+            positions = positions[positions < size]
+            scores = vectors[positions] @ query
+            best = positions[_top_k(scores, want)]
+        else:
+            best_positions, best_scores = [], []
+            for start in range(0, size, self.block_rows):
+                scores = vectors[start:min(size, start + self.block_rows)] @ query
+                top = _top_k(scores, want)
+                best_positions.append(top + start)
+                best_scores.append(scores[top])
+            if not best_positions:
+                return []
+            merged = np.concatenate(best_scores)
+            best = np.concatenate(best_positions)[_top_k(merged, want)]
+
+        results = []
+        for position in best:
+            row = int(rows[position])
+            if row in exclude:
+                continue
+            results.append((row, float(vectors[position] @ query), int(clusters[position])))
+            if len(results) == k:
+                break
+        return results
+
+    def catch_up(self, store=None):
+        """Embed and add dataset rows appended since the index was last updated."""
+        store = store or get_dataset_store()
+        with self._catch_up_lock:
+            if store.count() <= self.next_row:
+                return 0
+            frame = store.read_frame([SUMMARY_COLUMN], start=self.next_row)
+            summaries = frame[SUMMARY_COLUMN].astype(str).tolist()
+            first_row = self.next_row
+            for offset in range(0, len(summaries), CATCH_UP_BATCH):
+                batch = summaries[offset:offset + CATCH_UP_BATCH]
+                vectors = embed_for_index(batch)
+                self.add(vectors, np.arange(first_row + offset, first_row + offset + len(batch)))
+            logging.info(f"Related-stories index caught up with {len(summaries)} appended row(s)")
+            return len(summaries)
+
+
+def embed_for_index(texts):
+    """Embeddings of texts, preprocessed the same way as the summaries the model was trained on."""
+    return get_bert_model().encode(preprocess_batch(texts), convert_to_numpy=True)
+
+
+_build_lock = threading.Lock()
+
+
+def get_vector_index(bundle):
+    """The VectorIndex of a ModelBundle, built on first use."""
+    index = bundle.cache.get("vector_index")
+    if index is not None:
+        return index
+    with _build_lock:
+        index = bundle.cache.get("vector_index")
+        if index is not None:
+            return index
+        started = time.perf_counter()
+        index = VectorIndex(get_normalized_centroids(bundle))
+        model_data = bundle.model_data
+        if "embeddings" in model_data:
+            embeddings = model_data["embeddings"]
+            # Training embeds every dataset row in order, so embedding i is dataset row i
+            labels = model_data["labels"] if "labels" in model_data else None
+            index.add(embeddings, np.arange(len(embeddings)), labels)
+        else:
+            logging.warning(f"Model {bundle.version} has no stored embeddings; embedding the dataset for the related-stories index")
+        # Published before catching up, so rows appended meanwhile are picked up by notify_appended
+        bundle.cache["vector_index"] = index
+        index.catch_up()
+        record_timing("load:vector_index", time.perf_counter() - started)
+        logging.info(f"Related-stories index for model {bundle.version}: {len(index)} rows ({index.mode})")
+        return index
+
+
+def notify_appended(bundle):
+    """Add newly appended dataset rows to the bundle's index, if it has been built."""
+    index = bundle.cache.get("vector_index") if bundle is not None else None
+    if index is not None:
+        index.catch_up()